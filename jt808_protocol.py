@@ -17,8 +17,13 @@ Escape Rules:
 - 0x7D 0x01 -> 0x7D
 - 0x7D 0x02 -> 0x7E
 """
+import socket
 import struct
-import binascii
+import os
+import sys
+import itertools
+from functools import lru_cache
+from typing import NamedTuple
 
 # JTT 808 Message IDs
 MSG_ID_TERMINAL_RESPONSE = 0x0001
@@ -47,94 +52,292 @@ MSG_ID_VIDEO_LIST_RESPONSE = 0x1205
 START_FLAG = 0x7E
 ESCAPE_FLAG = 0x7D
 ESCAPE_XOR = 0x20
+_FLAG = bytes([START_FLAG])
+_ESCAPE = bytes([ESCAPE_FLAG])
+# escape_decode: second byte of an escape pair -> decoded byte
+_ESCAPE_CODES = (b'\x01', b'\x02')
+_UNESCAPED = (None, _ESCAPE, _FLAG)
+
+# Field-by-field dumps of built 0x9101/0x9102/0x9202/0x9205 requests
+PROTOCOL_DEBUG = os.environ.get('PROTOCOL_DEBUG', 'false').lower() == 'true'
+
+# Message header: ID(2) + Attributes(2) + Phone(6) + Sequence(2), big-endian
+HEADER_STRUCT = struct.Struct('>HH6sH')
+
+# Precompiled big-endian field codecs (avoid re-parsing format strings per call)
+_U8 = struct.Struct('>B')
+_U16 = struct.Struct('>H')
+_U32 = struct.Struct('>I')
+_U16_PAIR = struct.Struct('>HH')
+
+# BCD lookup tables: byte -> two-digit value (None if a nibble is not 0-9),
+# and byte -> the digit string the video list parser has always produced
+_BCD_TO_INT = [(i >> 4) * 10 + (i & 0x0F) if (i >> 4) < 10 and (i & 0x0F) < 10 else None for i in range(256)]
+_BCD_TO_STR = tuple(f'{i >> 4}{i & 0x0F}' for i in range(256))
+
+# Video list entries: Channel(1) + Start(6, BCD) + End(6, BCD) + Alarm(4) + Type(1) [+ File size(4)]
+# Constant response bodies for the common success case
+_RESULT_OK_BODY = b'\x00'  # 1-byte result code 0
+_REGISTER_OK_BODY = b'\x00\x00\x00\x00'  # 2-byte result 0 + empty auth code
+
+# 0x0200 location basic info: alarm, status, lat, lon, altitude, speed, direction
+_LOCATION_STRUCT = struct.Struct('>IIiiHHH')
+# 0x1205 video upload prefix: channel, data/stream/codec type, then the
+# alarm, status, lat, lon, altitude, speed, direction GPS fields
+_VIDEO_FIXED = struct.Struct('>BBBBIIIIHHH')
+# 0x0001 terminal general response: reply serial, reply ID, result
+_TERMINAL_RESPONSE = struct.Struct('>HHB')
+_VIDEO_ENTRY = struct.Struct('>B6s6sIB')
+_VIDEO_ENTRY_WITH_SIZE = struct.Struct('>B6s6sIBI')
+
+def _encode_bcd_digits(digits):
+    """Pack a string of decimal digit pairs (e.g. YYMMDDHHmmss) into BCD bytes"""
+    if not (digits.isascii() and digits.isdigit()):
+        raise ValueError(f"BCD string must contain only digits, got: {digits}")
+    # Each BCD byte is two decimal digits, so this is plain hex decoding
+    return bytes.fromhex(digits)
+
+def bcd_to_str(raw):
+    """BCD time bytes -> digit string; hex() is identical whenever every nibble is 0-9"""
+    text = raw.hex()
+    if text.isdigit():
+        return text
+    return ''.join([_BCD_TO_STR[b] for b in raw])
+
+@lru_cache(maxsize=4096)
+def _decode_phone(raw):
+    """Decode a 6-byte BCD phone field (12 digits) once per device, interned for fast dict keys"""
+    return sys.intern(raw.hex())
+
+def _xor_checksum(data):
+    """
+    XOR of all bytes, computed by loading the data as one big integer and
+    folding it in half until a single byte is left (log2(n) big-int ops in C
+    instead of one bytecode dispatch per byte)
+    """
+    value = int.from_bytes(data, 'little')
+    width = len(data)
+    while width > 1:
+        half = (width + 1) // 2
+        bits = half * 8
+        value = (value >> bits) ^ (value & ((1 << bits) - 1))
+        width = half
+    return value
+
+@lru_cache(maxsize=4096)
+def _response_prefix(msg_id, phone, body_length):
+    """
+    Message ID + attribute + phone header prefix and its XOR checksum, cached
+    per device and body length (bodies such as 0x8001 replies echo the
+    device's sequence, so they are not part of the key)
+    
+    Returns: (prefix, prefix_checksum)
+    """
+    prefix = _U16_PAIR.pack(msg_id, body_length)  # Message ID + attribute (body length)
+    prefix += bytes.fromhex(phone).ljust(6, b'\x00')[:6]  # Phone number (BCD, 12 digits)
+    return prefix, _xor_checksum(prefix)
+
+# Shared result for messages that pass (or have no) validation rules
+_NO_ERRORS = ()
+_VALID = (True, _NO_ERRORS)
+
+def _validate_video_realtime_request(msg_id, body):
+    """0x9101: IP_len(1) + IP(4) + TCP_port(2) + UDP_port(2) + Channel(1) + DataType(1) + StreamType(1) = 12 bytes"""
+    errors = []
+    if len(body) < 12:
+        errors.append(f"0x9101 body too short: {len(body)} bytes (expected 12)")
+    elif len(body) > 12:
+        errors.append(f"0x9101 body too long: {len(body)} bytes (expected 12)")
+    else:
+        # Validate IP length
+        ip_length = body[0]
+        if ip_length != 4:
+            errors.append(f"0x9101 IP length invalid: {ip_length} (expected 4)")
+        # Validate channel, data_type, stream_type ranges
+        channel = body[9]
+        if channel > 127:  # Typically 0-127
+            errors.append(f"0x9101 Channel out of range: {channel}")
+        data_type = body[10]
+        if data_type > 2:
+            errors.append(f"0x9101 Data type out of range: {data_type} (expected 0-2)")
+        stream_type = body[11]
+        if stream_type > 1:
+            errors.append(f"0x9101 Stream type out of range: {stream_type} (expected 0-1)")
+    return errors
+
+def _validate_video_data(msg_id, body):
+    """0x9201: Channel(1) + DataType(1) + PackageType(1) + Timestamp(6) + Interval(2) + Size(2) = 13 bytes minimum"""
+    if len(body) < 13:
+        return [f"0x{msg_id:04X} body too short: {len(body)} bytes (minimum 13)"]
+    return _NO_ERRORS
+
+def _validate_video_data_control(msg_id, body):
+    """
+    0x9202 can be either:
+    - Control command (when sent TO device): 4 bytes [ControlType(1)][Channel(1)][DataType(1)][StreamType(1)]
+    - Video data (when received FROM device): 13+ bytes [Channel(1)][DataType(1)][PackageType(1)][Timestamp(6)][Interval(2)][Size(2)][Data...]
+    """
+    if len(body) == 4 or len(body) >= 13:
+        return _NO_ERRORS
+    # Invalid length (between 5-12 bytes is invalid)
+    return [f"0x{msg_id:04X} body length invalid: {len(body)} bytes (expected 4 for control command or 13+ for video data)"]
+
+# msg_id -> validator(msg_id, body) returning a sequence of error strings
+_VALIDATORS = {
+    MSG_ID_VIDEO_REALTIME_REQUEST: _validate_video_realtime_request,
+    MSG_ID_VIDEO_DATA: _validate_video_data,
+    MSG_ID_VIDEO_DATA_CONTROL: _validate_video_data_control,
+}
+
+# Terminal general response result codes 0-3
+_RESULT_MEANINGS = ("Success/Confirmation", "Failure", "Message Error", "Not Supported")
+
+class ParsedMessage(NamedTuple):
+    """Decoded JT808 frame returned by parse_message"""
+    msg_id: int
+    msg_attr: int
+    phone: str
+    msg_seq: int
+    body: bytes
+    raw: bytes
+
+class TerminalResponse(NamedTuple):
+    """Terminal general response (0x0001)"""
+    reply_serial: int
+    reply_id: int
+    result: int
+    result_text: str
+
+class LocationTime(NamedTuple):
+    """BCD timestamp of a location report, 4-digit year"""
+    year: int
+    month: int
+    day: int
+    hour: int
+    minute: int
+    second: int
+    raw: bytes
+
+class LocationData(NamedTuple):
+    """Location data upload (0x0200)"""
+    alarm_flag: int
+    status: int
+    latitude: float
+    longitude: float
+    altitude: int
+    speed: float
+    direction: int
+    time: LocationTime
+    additional_info: bytes
+
+class VideoData(NamedTuple):
+    """JTT 1078 video data upload (0x1205)"""
+    logic_channel: int
+    data_type: int
+    stream_type: int
+    codec_type: int
+    latitude: float
+    longitude: float
+    altitude: int
+    speed: float
+    direction: int
+    video_data: memoryview  # zero-copy view into the message body; copy with bytes() before storing it
 
 class JT808Parser:
+    # The parser is stateless apart from this counter; no per-instance dict
+    __slots__ = ('checksum_errors',)
+    
     def __init__(self):
-        self.buffer = bytearray()
-        
+        # Checksum mismatches seen by this parser; only every 256th is printed.
+        # One parser is shared by all connection threads, so this is a rough,
+        # process-wide figure (sampling is not per device). itertools.count
+        # advances in a single C call, so threads need no lock to bump it.
+        self.checksum_errors = itertools.count(1)
+    
     def escape_decode(self, data):
         """Decode escaped data (0x7D 0x01 -> 0x7D, 0x7D 0x02 -> 0x7E)"""
-        result = bytearray()
-        i = 0
-        while i < len(data):
-            if data[i] == ESCAPE_FLAG and i + 1 < len(data):
-                if data[i + 1] == 0x01:
-                    result.append(ESCAPE_FLAG)
-                    i += 2
-                elif data[i + 1] == 0x02:
-                    result.append(START_FLAG)
-                    i += 2
-                else:
-                    result.append(data[i])
-                    i += 1
+        if data.find(ESCAPE_FLAG) == -1:
+            return bytes(data)
+        
+        # Split on 0x7D: every run after the first starts right after an escape
+        # byte, so only its lead byte needs looking at; the copying and the
+        # final join happen in C
+        parts = data.split(_ESCAPE)
+        result = [parts[0]]
+        for part in parts[1:]:
+            if part[:1] in _ESCAPE_CODES:
+                result.append(_UNESCAPED[part[0]])
+                result.append(part[1:])
             else:
-                result.append(data[i])
-                i += 1
-        return bytes(result)
+                # Not a valid escape pair: keep the 0x7D as is
+                result.append(_ESCAPE)
+                result.append(part)
+        return b''.join(result)
     
     def escape_encode(self, data):
         """Encode data with escape sequences"""
-        result = bytearray()
-        for byte in data:
-            if byte == ESCAPE_FLAG:
-                result.append(ESCAPE_FLAG)
-                result.append(0x01)
-            elif byte == START_FLAG:
-                result.append(ESCAPE_FLAG)
-                result.append(0x02)
-            else:
-                result.append(byte)
-        return bytes(result)
+        # Most messages contain neither flag byte
+        if ESCAPE_FLAG not in data and START_FLAG not in data:
+            return bytes(data)
+        # 0x7D must be escaped first so the 0x7D bytes introduced for 0x7E stay intact
+        return bytes(data.replace(b'\x7d', b'\x7d\x01').replace(b'\x7e', b'\x7d\x02'))
     
     def calculate_checksum(self, data):
         """Calculate XOR checksum"""
-        checksum = 0
-        for byte in data:
-            checksum ^= byte
-        return checksum
+        return _xor_checksum(data)
     
     def parse_message(self, data):
         """Parse JTT 808 message"""
-        if len(data) < 12:  # Minimum message size
-            return None
-            
-        if data[0] != START_FLAG or data[-1] != START_FLAG:
+        # Minimum message size and start/end flags in one short-circuit test
+        if len(data) < 12 or data[0] != START_FLAG or data[-1] != START_FLAG:
             return None
         
         # Extract message body (between start flags)
-        body = data[1:-1]
-        body = self.escape_decode(body)
+        body = self.escape_decode(data[1:-1])
         
-        if len(body) < 11:
+        # Header (12 bytes) + checksum (1 byte) at minimum
+        if len(body) < 13:
             return None
         
-        # Extract checksum (last byte before end flag)
+        # Verify checksum in the same pass over the decoded bytes: XOR over the
+        # message plus its checksum byte is zero when they match
         received_checksum = body[-1]
-        message_data = body[:-1]
-        
-        # Verify checksum
-        calculated_checksum = self.calculate_checksum(message_data)
+        calculated_checksum = _xor_checksum(body) ^ received_checksum
         if received_checksum != calculated_checksum:
-            print(f"[WARNING] Checksum mismatch: received={received_checksum:02X}, calculated={calculated_checksum:02X}")
+            error_count = next(self.checksum_errors)
+            if error_count & 0xFF == 1:
+                print(f"[WARNING] Checksum mismatch: received={received_checksum:02X}, calculated={calculated_checksum:02X} (~{error_count} total)")
             # Continue anyway for debugging
         
-        # Parse message header
-        msg_id = struct.unpack('>H', message_data[0:2])[0]
-        msg_attr = struct.unpack('>H', message_data[2:4])[0]
-        phone = message_data[4:10].decode('ascii', errors='ignore')
-        msg_seq = struct.unpack('>H', message_data[10:12])[0]
-        
-        # Extract body
-        msg_body = message_data[12:] if len(message_data) > 12 else b''
-        
-        return {
-            'msg_id': msg_id,
-            'msg_attr': msg_attr,
-            'phone': phone,
-            'msg_seq': msg_seq,
-            'body': msg_body,
-            'raw': data
-        }
+        # Parse message header (one precompiled unpack, no intermediate slices)
+        msg_id, msg_attr, raw_phone, msg_seq = HEADER_STRUCT.unpack_from(body)
+        phone = _decode_phone(raw_phone)
+        
+        # Extract body (between header and checksum)
+        msg_body = body[12:-1]
+        
+        return ParsedMessage(msg_id, msg_attr, phone, msg_seq, msg_body, data)
+    
+    def parse_frame(self, buffer, start=0):
+        """
+        Extract and parse one framed message from a stream buffer
+        
+        Args:
+            buffer: Received stream data (bytes or bytearray)
+            start: Offset of the 0x7E start flag in buffer
+        
+        Returns: (frame, msg, next_offset)
+            frame is None if the end flag has not arrived yet (next_offset == start);
+            msg is None if the frame could not be parsed
+        """
+        end = buffer.find(START_FLAG, start + 1)
+        if end == -1:
+            return None, None, start
+        
+        # Copy the frame straight out of the buffer (slicing a bytearray first
+        # would copy it twice)
+        frame = bytes(memoryview(buffer)[start:end + 1])
+        return frame, self.parse_message(frame), end + 1
     
     def validate_message_format(self, msg_id, body):
         """
@@ -142,53 +345,15 @@ class JT808Parser:
         
         Returns: (is_valid, errors_list)
         """
-        errors = []
-        
-        if msg_id == MSG_ID_VIDEO_REALTIME_REQUEST:
-            # 0x9101: IP_len(1) + IP(4) + TCP_port(2) + UDP_port(2) + Channel(1) + DataType(1) + StreamType(1) = 12 bytes
-            if len(body) < 12:
-                errors.append(f"0x9101 body too short: {len(body)} bytes (expected 12)")
-            elif len(body) > 12:
-                errors.append(f"0x9101 body too long: {len(body)} bytes (expected 12)")
-            else:
-                # Validate IP length
-                ip_length = body[0]
-                if ip_length != 4:
-                    errors.append(f"0x9101 IP length invalid: {ip_length} (expected 4)")
-                # Validate ports are in valid range (check bytes, not values)
-                # Validate channel, data_type, stream_type ranges
-                if len(body) >= 10:
-                    channel = body[9]
-                    if channel > 127:  # Typically 0-127
-                        errors.append(f"0x9101 Channel out of range: {channel}")
-                if len(body) >= 11:
-                    data_type = body[10]
-                    if data_type > 2:
-                        errors.append(f"0x9101 Data type out of range: {data_type} (expected 0-2)")
-                if len(body) >= 12:
-                    stream_type = body[11]
-                    if stream_type > 1:
-                        errors.append(f"0x9101 Stream type out of range: {stream_type} (expected 0-1)")
-        
-        elif msg_id == MSG_ID_VIDEO_DATA:
-            # 0x9201: Channel(1) + DataType(1) + PackageType(1) + Timestamp(6) + Interval(2) + Size(2) = 13 bytes minimum
-            if len(body) < 13:
-                errors.append(f"0x{msg_id:04X} body too short: {len(body)} bytes (minimum 13)")
-        elif msg_id == MSG_ID_VIDEO_DATA_CONTROL:
-            # 0x9202 can be either:
-            # - Control command (when sent TO device): 4 bytes [ControlType(1)][Channel(1)][DataType(1)][StreamType(1)]
-            # - Video data (when received FROM device): 13+ bytes [Channel(1)][DataType(1)][PackageType(1)][Timestamp(6)][Interval(2)][Size(2)][Data...]
-            if len(body) == 4:
-                # Valid control command format
-                pass
-            elif len(body) >= 13:
-                # Valid video data format
-                pass
-            else:
-                # Invalid length (between 5-12 bytes is invalid)
-                errors.append(f"0x{msg_id:04X} body length invalid: {len(body)} bytes (expected 4 for control command or 13+ for video data)")
-        
-        return (len(errors) == 0, errors)
+        # Most message IDs have no rules: a single dict lookup
+        validator = _VALIDATORS.get(msg_id)
+        if validator is None:
+            return _VALID
+        
+        errors = validator(msg_id, body)
+        if not errors:
+            return _VALID
+        return (False, errors)
     
     def build_response(self, msg_id, phone, msg_seq, body=b''):
         """Build JTT 808 response message"""
@@ -197,26 +362,18 @@ class JT808Parser:
         if not is_valid:
             print(f"[PROTOCOL VALIDATION] Warnings for 0x{msg_id:04X}: {errors}")
         
-        # Build message header
-        header = struct.pack('>H', msg_id)  # Message ID
-        header += struct.pack('>H', len(body))  # Message attribute (body length)
-        header += phone.encode('ascii').ljust(6, b'\x00')[:6]  # Phone number
-        header += struct.pack('>H', msg_seq)  # Message sequence
-        
-        # Combine header and body
-        message_data = header + body
-        
-        # Calculate checksum
-        checksum = self.calculate_checksum(message_data)
-        message_data += bytes([checksum])
-        
-        # Escape encode
-        escaped = self.escape_encode(message_data)
-        
-        # Add start flags
-        packet = bytes([START_FLAG]) + escaped + bytes([START_FLAG])
-        
-        return packet
+        # Cached header prefix + sequence + body; XOR is associative, so the
+        # checksum is the cached prefix checksum folded with the rest
+        prefix, checksum = _response_prefix(msg_id, phone, len(body))
+        message_data = bytearray(prefix)
+        message_data += _U16.pack(msg_seq)  # Message sequence
+        message_data += body
+        message_data.append(checksum ^ (msg_seq >> 8) ^ (msg_seq & 0xFF) ^ _xor_checksum(body))
+        
+        # Escape only when a flag byte is present, then frame in a single join
+        if ESCAPE_FLAG in message_data or START_FLAG in message_data:
+            message_data = self.escape_encode(message_data)
+        return b''.join((_FLAG, message_data, _FLAG))
     
     def build_register_response(self, phone, msg_seq, result_code=0):
         """
@@ -226,8 +383,11 @@ class JT808Parser:
         - Bytes 0-1: Result code (2 bytes, big-endian): 0=success, 1=failure
         - Bytes 2-17: Authentication code (16 bytes, ASCII, null-padded)
         """
-        body = struct.pack('>H', result_code)  # Result code (0=success)
-        body += b'\x00\x00'  # Authentication code (empty)
+        if result_code == 0:
+            body = _REGISTER_OK_BODY
+        else:
+            body = _U16.pack(result_code)  # Result code (0=success)
+            body += b'\x00\x00'  # Authentication code (empty)
         return self.build_response(MSG_ID_REGISTER_RESPONSE, phone, msg_seq, body)
     
     def build_heartbeat_response(self, phone, msg_seq):
@@ -246,7 +406,7 @@ class JT808Parser:
         JTT808 Protocol Format (Message Body):
         - Byte 0: Result code (1 byte): 0=success, 1=failure, 2=invalid, 3=not supported
         """
-        body = struct.pack('>B', result_code)  # Result code
+        body = _RESULT_OK_BODY if result_code == 0 else _U8.pack(result_code)  # Result code
         return self.build_response(MSG_ID_TERMINAL_AUTH_RESPONSE, phone, msg_seq, body)
     
     def parse_location_data(self, body):
@@ -255,53 +415,33 @@ class JT808Parser:
             return None
         
         # Parse location data message (0x0200)
-        alarm_flag = struct.unpack('>I', body[0:4])[0]
-        status = struct.unpack('>I', body[4:8])[0]
-        
-        # Latitude and Longitude are signed integers
-        latitude_raw = struct.unpack('>i', body[8:12])[0]
-        longitude_raw = struct.unpack('>i', body[12:16])[0]
+        # Single unpack for the fixed 22-byte block (latitude/longitude are signed)
+        (alarm_flag, status, latitude_raw, longitude_raw,
+         altitude, speed_raw, direction) = _LOCATION_STRUCT.unpack_from(body)
         latitude = latitude_raw / 1000000.0
         longitude = longitude_raw / 1000000.0
-        
-        altitude = struct.unpack('>H', body[16:18])[0]
-        speed = struct.unpack('>H', body[18:20])[0] / 10.0  # km/h
-        direction = struct.unpack('>H', body[20:22])[0]  # degrees 0-359
+        speed = speed_raw / 10.0  # km/h
         time_bcd = body[22:28]  # BCD format: YYMMDDHHmmss
         
-        # Parse BCD time
-        time_str = binascii.hexlify(time_bcd).decode()
-        year = int(time_str[0:2])
-        month = int(time_str[2:4])
-        day = int(time_str[4:6])
-        hour = int(time_str[6:8])
-        minute = int(time_str[8:10])
-        second = int(time_str[10:12])
+        # Parse BCD time (table lookup per byte, unrolled: no hex string
+        # round-trip and no comprehension)
+        bcd = _BCD_TO_INT
+        year, month, day, hour, minute, second = (
+            bcd[time_bcd[0]], bcd[time_bcd[1]], bcd[time_bcd[2]],
+            bcd[time_bcd[3]], bcd[time_bcd[4]], bcd[time_bcd[5]])
+        if None in (year, month, day, hour, minute, second):
+            raise ValueError(f"Invalid BCD time: {time_bcd.hex()}")
         # Convert 2-digit year to 4-digit (assuming 2000-2099)
         year = 2000 + year if year < 100 else year
         
         # Additional information (optional, variable length)
         additional_info = body[28:] if len(body) > 28 else b''
         
-        return {
-            'alarm_flag': alarm_flag,
-            'status': status,
-            'latitude': latitude,
-            'longitude': longitude,
-            'altitude': altitude,
-            'speed': speed,
-            'direction': direction,
-            'time': {
-                'year': year,
-                'month': month,
-                'day': day,
-                'hour': hour,
-                'minute': minute,
-                'second': second,
-                'raw': time_bcd
-            },
-            'additional_info': additional_info
-        }
+        return LocationData(
+            alarm_flag, status, latitude, longitude, altitude, speed, direction,
+            LocationTime(year, month, day, hour, minute, second, time_bcd),
+            additional_info
+        )
     
     def parse_terminal_response(self, body):
         """Parse terminal general response message (0x0001)"""
@@ -309,33 +449,19 @@ class JT808Parser:
             return None
         
         # Parse terminal response message (0x0001)
-        reply_serial = struct.unpack('>H', body[0:2])[0]
-        reply_id = struct.unpack('>H', body[2:4])[0]
-        result = struct.unpack('>B', body[4:5])[0]
-        
-        # Result code meanings
-        result_meanings = {
-            0: "Success/Confirmation",
-            1: "Failure",
-            2: "Message Error",
-            3: "Not Supported"
-        }
-        
-        return {
-            'reply_serial': reply_serial,
-            'reply_id': reply_id,
-            'result': result,
-            'result_text': result_meanings.get(result, f"Unknown ({result})")
-        }
+        reply_serial, reply_id, result = _TERMINAL_RESPONSE.unpack_from(body)
+        
+        result_text = _RESULT_MEANINGS[result] if result < 4 else f"Unknown ({result})"
+        return TerminalResponse(reply_serial, reply_id, result, result_text)
     
     def build_location_response(self, phone, msg_seq, result_code=0):
         """Build location data upload response (0x8003)"""
-        body = struct.pack('>B', result_code)  # Result code (0=success)
+        body = _RESULT_OK_BODY if result_code == 0 else _U8.pack(result_code)  # Result code (0=success)
         return self.build_response(MSG_ID_LOCATION_RESPONSE, phone, msg_seq, body)
     
     def build_logout_response(self, phone, msg_seq, result_code=0):
         """Build terminal logout response (0x8001)"""
-        body = struct.pack('>B', result_code)  # Result code (0=success)
+        body = _RESULT_OK_BODY if result_code == 0 else _U8.pack(result_code)  # Result code (0=success)
         return self.build_response(MSG_ID_LOGOUT_RESPONSE, phone, msg_seq, body)
     
     def build_terminal_response(self, phone, msg_seq, reply_id, result_code=0):
@@ -347,9 +473,9 @@ class JT808Parser:
         - Bytes 2-3: Reply message ID (2 bytes, big-endian)
         - Byte 4: Result code (1 byte): 0=success, 1=failure, 2=message error, 3=not supported
         """
-        body = struct.pack('>H', msg_seq)  # Reply serial (use current message sequence)
-        body += struct.pack('>H', reply_id)  # Reply message ID
-        body += struct.pack('>B', result_code)  # Result code
+        body = _U16.pack(msg_seq)  # Reply serial (use current message sequence)
+        body += _U16.pack(reply_id)  # Reply message ID
+        body += _U8.pack(result_code)  # Result code
         return self.build_response(MSG_ID_TERMINAL_RESPONSE, phone, msg_seq, body)
     
     def build_video_realtime_request(self, phone, msg_seq, server_ip, tcp_port, udp_port, 
@@ -376,13 +502,11 @@ class JT808Parser:
             data_type: Data type (1 byte): 0=AV, 1=Video only, 2=Audio only (default=1)
             stream_type: Stream type (1 byte): 0=Main stream, 1=Sub stream (default=0)
         """
-        import binascii
-        
-        # Parse IP address to bytes
-        ip_parts = server_ip.split('.')
-        if len(ip_parts) != 4:
-            raise ValueError(f"Invalid IPv4 address: {server_ip}")
-        ip_bytes = bytes([int(part) for part in ip_parts])
+        # Parse IP address to bytes (single C call, rejects malformed dotted quads)
+        try:
+            ip_bytes = socket.inet_pton(socket.AF_INET, server_ip)
+        except OSError:
+            raise ValueError(f"Invalid IPv4 address: {server_ip}") from None
         ip_length = len(ip_bytes)
         
         # Validate field sizes
@@ -399,45 +523,47 @@ class JT808Parser:
         if stream_type < 0 or stream_type > 1:
             raise ValueError(f"Stream type must be 0-1, got {stream_type}")
         
-        # Build message body with detailed logging
+        # Build message body
         body = bytearray()
         
         # Byte 0: IP address length
-        body.extend(struct.pack('>B', ip_length))
-        print(f"[PROTOCOL 0x9101] Field 0: IP length = {ip_length} bytes")
+        body.extend(_U8.pack(ip_length))
         
         # Bytes 1-4: IP address
         body.extend(ip_bytes)
-        print(f"[PROTOCOL 0x9101] Field 1: IP address = {server_ip} ({binascii.hexlify(ip_bytes).decode()})")
         
         # Bytes 5-6: TCP port (big-endian)
-        tcp_port_bytes = struct.pack('>H', tcp_port)
+        tcp_port_bytes = _U16.pack(tcp_port)
         body.extend(tcp_port_bytes)
-        print(f"[PROTOCOL 0x9101] Field 2: TCP port = {tcp_port} (0x{binascii.hexlify(tcp_port_bytes).decode()})")
         
         # Bytes 7-8: UDP port (big-endian)
-        udp_port_bytes = struct.pack('>H', udp_port)
+        udp_port_bytes = _U16.pack(udp_port)
         body.extend(udp_port_bytes)
-        print(f"[PROTOCOL 0x9101] Field 3: UDP port = {udp_port} (0x{binascii.hexlify(udp_port_bytes).decode()})")
         
         # Byte 9: Logical channel number
-        body.extend(struct.pack('>B', channel))
-        print(f"[PROTOCOL 0x9101] Field 4: Channel = {channel} (0x{channel:02X})")
+        body.extend(_U8.pack(channel))
         
         # Byte 10: Data type
-        body.extend(struct.pack('>B', data_type))
-        data_type_names = {0: 'AV', 1: 'Video only', 2: 'Audio only'}
-        print(f"[PROTOCOL 0x9101] Field 5: Data type = {data_type} ({data_type_names.get(data_type, 'Unknown')})")
+        body.extend(_U8.pack(data_type))
         
         # Byte 11: Stream type
-        body.extend(struct.pack('>B', stream_type))
-        stream_type_names = {0: 'Main stream', 1: 'Sub stream'}
-        print(f"[PROTOCOL 0x9101] Field 6: Stream type = {stream_type} ({stream_type_names.get(stream_type, 'Unknown')})")
+        body.extend(_U8.pack(stream_type))
         
-        # Log complete body structure
         body_bytes = bytes(body)
-        print(f"[PROTOCOL 0x9101] Complete body: {len(body_bytes)} bytes, hex: {binascii.hexlify(body_bytes).decode()}")
-        print(f"[PROTOCOL 0x9101] Body structure: [IP_len(1)][IP(4)][TCP_port(2)][UDP_port(2)][Channel(1)][DataType(1)][StreamType(1)]")
+        
+        # Log complete body structure
+        if PROTOCOL_DEBUG:
+            data_type_names = {0: 'AV', 1: 'Video only', 2: 'Audio only'}
+            stream_type_names = {0: 'Main stream', 1: 'Sub stream'}
+            print(f"[PROTOCOL 0x9101] Field 0: IP length = {ip_length} bytes")
+            print(f"[PROTOCOL 0x9101] Field 1: IP address = {server_ip} ({ip_bytes.hex()})")
+            print(f"[PROTOCOL 0x9101] Field 2: TCP port = {tcp_port} (0x{tcp_port_bytes.hex()})")
+            print(f"[PROTOCOL 0x9101] Field 3: UDP port = {udp_port} (0x{udp_port_bytes.hex()})")
+            print(f"[PROTOCOL 0x9101] Field 4: Channel = {channel} (0x{channel:02X})")
+            print(f"[PROTOCOL 0x9101] Field 5: Data type = {data_type} ({data_type_names.get(data_type, 'Unknown')})")
+            print(f"[PROTOCOL 0x9101] Field 6: Stream type = {stream_type} ({stream_type_names.get(stream_type, 'Unknown')})")
+            print(f"[PROTOCOL 0x9101] Complete body: {len(body_bytes)} bytes, hex: {body_bytes.hex()}")
+            print(f"[PROTOCOL 0x9101] Body structure: [IP_len(1)][IP(4)][TCP_port(2)][UDP_port(2)][Channel(1)][DataType(1)][StreamType(1)]")
         
         return self.build_response(MSG_ID_VIDEO_REALTIME_REQUEST, phone, msg_seq, body_bytes)
     
@@ -460,60 +586,62 @@ class JT808Parser:
             start_time: Start time (BCD format: YYMMDDHHmmss, None = no limit)
             end_time: End time (BCD format: YYMMDDHHmmss, None = no limit)
         """
-        import binascii
-        
-        print(f"[PROTOCOL 0x9205] Building video list query for device {phone}")
-        print(f"[PROTOCOL 0x9205] Parameters: channel={channel} (0x{channel:02X}), video_type={video_type} (0x{video_type:02X})")
-        
         body = bytearray()
         
         # Byte 0: Channel number
-        body.extend(struct.pack('>B', channel))
-        if channel == 0xFF:
-            print(f"[PROTOCOL 0x9205] Field 0: Channel = 0xFF (All channels)")
-        else:
-            print(f"[PROTOCOL 0x9205] Field 0: Channel = {channel} (0x{channel:02X})")
+        body.extend(_U8.pack(channel))
         
         # Byte 1: Video type
-        body.extend(struct.pack('>B', video_type))
-        if video_type == 0xFF:
-            print(f"[PROTOCOL 0x9205] Field 1: Video type = 0xFF (All types)")
-        else:
-            print(f"[PROTOCOL 0x9205] Field 1: Video type = {video_type} (0x{video_type:02X})")
+        body.extend(_U8.pack(video_type))
         
         # Bytes 2-7: Start time (6 bytes BCD or 0xFF... for no limit)
         if start_time:
             if isinstance(start_time, str) and len(start_time) == 12:
                 # Convert YYMMDDHHmmss string to BCD bytes
-                start_time_bytes = bytes([int(start_time[i]) * 16 + int(start_time[i+1]) for i in range(0, 12, 2)])
+                start_time_bytes = _encode_bcd_digits(start_time)
             else:
                 start_time_bytes = start_time[:6] if len(start_time) >= 6 else start_time + b'\xFF' * (6 - len(start_time))
-            body.extend(start_time_bytes)
-            print(f"[PROTOCOL 0x9205] Field 2: Start time = {binascii.hexlify(start_time_bytes).decode()}")
         else:
-            body.extend(b'\xFF' * 6)  # No start time limit
-            print(f"[PROTOCOL 0x9205] Field 2: Start time = 0xFFFFFFFFFFFF (No limit)")
+            start_time_bytes = b'\xFF' * 6  # No start time limit
+        body.extend(start_time_bytes)
         
         # Bytes 8-13: End time (6 bytes BCD or 0xFF... for no limit)
         if end_time:
             if isinstance(end_time, str) and len(end_time) == 12:
                 # Convert YYMMDDHHmmss string to BCD bytes
-                end_time_bytes = bytes([int(end_time[i]) * 16 + int(end_time[i+1]) for i in range(0, 12, 2)])
+                end_time_bytes = _encode_bcd_digits(end_time)
             else:
                 end_time_bytes = end_time[:6] if len(end_time) >= 6 else end_time + b'\xFF' * (6 - len(end_time))
-            body.extend(end_time_bytes)
-            print(f"[PROTOCOL 0x9205] Field 3: End time = {binascii.hexlify(end_time_bytes).decode()}")
         else:
-            body.extend(b'\xFF' * 6)  # No end time limit
-            print(f"[PROTOCOL 0x9205] Field 3: End time = 0xFFFFFFFFFFFF (No limit)")
+            end_time_bytes = b'\xFF' * 6  # No end time limit
+        body.extend(end_time_bytes)
         
-        # Log complete body structure
         body_bytes = bytes(body)
-        print(f"[PROTOCOL 0x9205] Complete body: {len(body_bytes)} bytes, hex: {binascii.hexlify(body_bytes).decode()}")
-        print(f"[PROTOCOL 0x9205] Body structure: [Channel(1)][VideoType(1)][StartTime(6)][EndTime(6)] = 14 bytes")
-        
         message = self.build_response(MSG_ID_VIDEO_LIST_QUERY, phone, msg_seq, body_bytes)
-        print(f"[PROTOCOL 0x9205] Complete message built: {len(message)} bytes")
+        
+        # Log complete body structure
+        if PROTOCOL_DEBUG:
+            print(f"[PROTOCOL 0x9205] Building video list query for device {phone}")
+            print(f"[PROTOCOL 0x9205] Parameters: channel={channel} (0x{channel:02X}), video_type={video_type} (0x{video_type:02X})")
+            if channel == 0xFF:
+                print(f"[PROTOCOL 0x9205] Field 0: Channel = 0xFF (All channels)")
+            else:
+                print(f"[PROTOCOL 0x9205] Field 0: Channel = {channel} (0x{channel:02X})")
+            if video_type == 0xFF:
+                print(f"[PROTOCOL 0x9205] Field 1: Video type = 0xFF (All types)")
+            else:
+                print(f"[PROTOCOL 0x9205] Field 1: Video type = {video_type} (0x{video_type:02X})")
+            if start_time:
+                print(f"[PROTOCOL 0x9205] Field 2: Start time = {start_time_bytes.hex()}")
+            else:
+                print(f"[PROTOCOL 0x9205] Field 2: Start time = 0xFFFFFFFFFFFF (No limit)")
+            if end_time:
+                print(f"[PROTOCOL 0x9205] Field 3: End time = {end_time_bytes.hex()}")
+            else:
+                print(f"[PROTOCOL 0x9205] Field 3: End time = 0xFFFFFFFFFFFF (No limit)")
+            print(f"[PROTOCOL 0x9205] Complete body: {len(body_bytes)} bytes, hex: {body_bytes.hex()}")
+            print(f"[PROTOCOL 0x9205] Body structure: [Channel(1)][VideoType(1)][StartTime(6)][EndTime(6)] = 14 bytes")
+            print(f"[PROTOCOL 0x9205] Complete message built: {len(message)} bytes")
         return message
     
     def build_video_download_request(self, phone, msg_seq, channel, start_time, end_time, 
@@ -539,58 +667,58 @@ class JT808Parser:
             video_type: Video type (1 byte, default=0)
             storage_type: Storage type (1 byte, default=0)
         """
-        import binascii
-        
         body = bytearray()
         
         # Byte 0: Channel number
-        body.extend(struct.pack('>B', channel))
-        print(f"[PROTOCOL 0x9102] Field 0: Channel = {channel} (0x{channel:02X})")
+        body.extend(_U8.pack(channel))
         
         # Bytes 1-6: Start time (BCD format: YYMMDDHHmmss)
         if isinstance(start_time, str):
             # Convert YYMMDDHHmmss string to BCD bytes
             if len(start_time) == 12:
                 # Convert each pair of digits to BCD byte
-                start_time_bytes = bytes([int(start_time[i]) * 16 + int(start_time[i+1]) for i in range(0, 12, 2)])
+                start_time_bytes = _encode_bcd_digits(start_time)
             else:
                 raise ValueError(f"Start time string must be 12 digits (YYMMDDHHmmss), got: {start_time}")
         else:
             start_time_bytes = start_time[:6] if len(start_time) >= 6 else start_time + b'\x00' * (6 - len(start_time))
         
         body.extend(start_time_bytes)
-        print(f"[PROTOCOL 0x9102] Field 1: Start time = {start_time_bytes.hex()}")
         
         # Bytes 7-12: End time (BCD format: YYMMDDHHmmss)
         if isinstance(end_time, str):
             # Convert YYMMDDHHmmss string to BCD bytes
             if len(end_time) == 12:
                 # Convert each pair of digits to BCD byte
-                end_time_bytes = bytes([int(end_time[i]) * 16 + int(end_time[i+1]) for i in range(0, 12, 2)])
+                end_time_bytes = _encode_bcd_digits(end_time)
             else:
                 raise ValueError(f"End time string must be 12 digits (YYMMDDHHmmss), got: {end_time}")
         else:
             end_time_bytes = end_time[:6] if len(end_time) >= 6 else end_time + b'\x00' * (6 - len(end_time))
         
         body.extend(end_time_bytes)
-        print(f"[PROTOCOL 0x9102] Field 2: End time = {end_time_bytes.hex()}")
         
         # Bytes 13-16: Alarm type (4 bytes, big-endian)
-        body.extend(struct.pack('>I', alarm_type))
-        print(f"[PROTOCOL 0x9102] Field 3: Alarm type = {alarm_type} (0x{alarm_type:08X})")
+        body.extend(_U32.pack(alarm_type))
         
         # Byte 17: Video type
-        body.extend(struct.pack('>B', video_type))
-        print(f"[PROTOCOL 0x9102] Field 4: Video type = {video_type} (0x{video_type:02X})")
+        body.extend(_U8.pack(video_type))
         
         # Byte 18: Storage type
-        body.extend(struct.pack('>B', storage_type))
-        print(f"[PROTOCOL 0x9102] Field 5: Storage type = {storage_type} (0x{storage_type:02X})")
+        body.extend(_U8.pack(storage_type))
         
-        # Log complete body structure
         body_bytes = bytes(body)
-        print(f"[PROTOCOL 0x9102] Complete body: {len(body_bytes)} bytes, hex: {binascii.hexlify(body_bytes).decode()}")
-        print(f"[PROTOCOL 0x9102] Body structure: [Channel(1)][StartTime(6)][EndTime(6)][AlarmType(4)][VideoType(1)][StorageType(1)]")
+        
+        # Log complete body structure
+        if PROTOCOL_DEBUG:
+            print(f"[PROTOCOL 0x9102] Field 0: Channel = {channel} (0x{channel:02X})")
+            print(f"[PROTOCOL 0x9102] Field 1: Start time = {start_time_bytes.hex()}")
+            print(f"[PROTOCOL 0x9102] Field 2: End time = {end_time_bytes.hex()}")
+            print(f"[PROTOCOL 0x9102] Field 3: Alarm type = {alarm_type} (0x{alarm_type:08X})")
+            print(f"[PROTOCOL 0x9102] Field 4: Video type = {video_type} (0x{video_type:02X})")
+            print(f"[PROTOCOL 0x9102] Field 5: Storage type = {storage_type} (0x{storage_type:02X})")
+            print(f"[PROTOCOL 0x9102] Complete body: {len(body_bytes)} bytes, hex: {body_bytes.hex()}")
+            print(f"[PROTOCOL 0x9102] Body structure: [Channel(1)][StartTime(6)][EndTime(6)][AlarmType(4)][VideoType(1)][StorageType(1)]")
         
         return self.build_response(MSG_ID_VIDEO_DOWNLOAD_REQUEST, phone, msg_seq, body_bytes)
     
@@ -621,54 +749,54 @@ class JT808Parser:
             data_type: Data type (0xFF = all types)
             stream_type: Stream type (0xFF = all streams)
         """
-        import binascii
-        
         # Validate parameters
         if control_type < 0 or control_type > 6:
             raise ValueError(f"Control type must be 0-6, got {control_type}")
         if channel < 0 or channel > 255:
             raise ValueError(f"Channel must be 0-255, got {channel}")
         
-        # Build message body with detailed logging
+        # Build message body
         body = bytearray()
         
         # Byte 0: Control type
-        body.extend(struct.pack('>B', control_type))
-        control_type_names = {
-            0: 'Close all channels',
-            1: 'Switch code stream',
-            2: 'Switch main/sub stream',
-            3: 'Switch bitrate',
-            4: 'Update keyframe interval',
-            5: 'Add designated terminal',
-            6: 'Delete designated terminal'
-        }
-        print(f"[PROTOCOL 0x9202] Field 0: Control type = {control_type} ({control_type_names.get(control_type, 'Unknown')})")
+        body.extend(_U8.pack(control_type))
         
         # Byte 1: Channel number
-        body.extend(struct.pack('>B', channel))
-        print(f"[PROTOCOL 0x9202] Field 1: Channel = {channel} (0x{channel:02X})")
+        body.extend(_U8.pack(channel))
         
         # Byte 2: Data type
-        body.extend(struct.pack('>B', data_type))
-        if data_type == 0xFF:
-            print(f"[PROTOCOL 0x9202] Field 2: Data type = 0xFF (All types)")
-        else:
-            data_type_names = {0: 'AV', 1: 'Video only', 2: 'Audio only'}
-            print(f"[PROTOCOL 0x9202] Field 2: Data type = {data_type} ({data_type_names.get(data_type, 'Unknown')})")
+        body.extend(_U8.pack(data_type))
         
         # Byte 3: Stream type
-        body.extend(struct.pack('>B', stream_type))
-        if stream_type == 0xFF:
-            print(f"[PROTOCOL 0x9202] Field 3: Stream type = 0xFF (All streams)")
-        else:
-            stream_type_names = {0: 'Main stream', 1: 'Sub stream'}
-            print(f"[PROTOCOL 0x9202] Field 3: Stream type = {stream_type} ({stream_type_names.get(stream_type, 'Unknown')})")
+        body.extend(_U8.pack(stream_type))
         
-        # Log complete body structure
         body_bytes = bytes(body)
-        print(f"[PROTOCOL 0x9202] Complete body: {len(body_bytes)} bytes, hex: {binascii.hexlify(body_bytes).decode()}")
-        print(f"[PROTOCOL 0x9202] Body structure: [ControlType(1)][Channel(1)][DataType(1)][StreamType(1)]")
+        
+        # Log complete body structure
+        if PROTOCOL_DEBUG:
+            control_type_names = {
+                0: 'Close all channels',
+                1: 'Switch code stream',
+                2: 'Switch main/sub stream',
+                3: 'Switch bitrate',
+                4: 'Update keyframe interval',
+                5: 'Add designated terminal',
+                6: 'Delete designated terminal'
+            }
+            print(f"[PROTOCOL 0x9202] Field 0: Control type = {control_type} ({control_type_names.get(control_type, 'Unknown')})")
+            print(f"[PROTOCOL 0x9202] Field 1: Channel = {channel} (0x{channel:02X})")
+            if data_type == 0xFF:
+                print(f"[PROTOCOL 0x9202] Field 2: Data type = 0xFF (All types)")
+            else:
+                data_type_names = {0: 'AV', 1: 'Video only', 2: 'Audio only'}
+                print(f"[PROTOCOL 0x9202] Field 2: Data type = {data_type} ({data_type_names.get(data_type, 'Unknown')})")
+            if stream_type == 0xFF:
+                print(f"[PROTOCOL 0x9202] Field 3: Stream type = 0xFF (All streams)")
+            else:
+                stream_type_names = {0: 'Main stream', 1: 'Sub stream'}
+                print(f"[PROTOCOL 0x9202] Field 3: Stream type = {stream_type} ({stream_type_names.get(stream_type, 'Unknown')})")
+            print(f"[PROTOCOL 0x9202] Complete body: {len(body_bytes)} bytes, hex: {body_bytes.hex()}")
+            print(f"[PROTOCOL 0x9202] Body structure: [ControlType(1)][Channel(1)][DataType(1)][StreamType(1)]")
         
         return self.build_response(MSG_ID_VIDEO_DATA_CONTROL, phone, msg_seq, body_bytes)
     
@@ -697,7 +825,7 @@ class JT808Parser:
         
         try:
             # Parse video count
-            video_count = struct.unpack('>H', body[0:2])[0]
+            video_count = _U16.unpack_from(body, 0)[0]
             print(f"[PROTOCOL] Parsing video list response: count={video_count}, body_size={len(body)} bytes")
             
             if video_count == 0:
@@ -731,7 +859,7 @@ class JT808Parser:
                 # Try to determine from first entry
                 if len(body) >= 2 + 22:
                     # Check if bytes 18-21 look like a file size (reasonable range: 0 to 10GB)
-                    file_size_test = struct.unpack('>I', body[2+18:2+22])[0]
+                    file_size_test = _U32.unpack_from(body, 2+18)[0]
                     if file_size_test < 10 * 1024 * 1024 * 1024:  # Less than 10GB
                         entry_size = 22
                         has_file_size = True
@@ -743,32 +871,18 @@ class JT808Parser:
                     entry_size = 18
                     print(f"[PROTOCOL] Using 18-byte format (default, body too short to determine)")
             
-            # Parse video entries
+            # Parse video entries (complete entries only, one C-level unpack per entry)
             videos = []
-            offset = 2
+            entry_struct = _VIDEO_ENTRY_WITH_SIZE if has_file_size else _VIDEO_ENTRY
+            complete = min(video_count, (len(body) - 2) // entry_size)
+            entries = memoryview(body)[2:2 + complete * entry_size]
             
-            for i in range(video_count):
-                if offset + entry_size > len(body):
-                    print(f"[PROTOCOL] Warning: Incomplete video list, expected {video_count} videos but only {len(videos)} complete")
-                    print(f"[PROTOCOL]   Remaining bytes: {len(body) - offset}, need {entry_size} for entry {i+1}")
-                    break
-                
-                # Parse video entry
-                channel = struct.unpack('>B', body[offset:offset+1])[0]
-                
-                # Parse start time (BCD: YYMMDDHHmmss)
-                start_time_bytes = body[offset+1:offset+7]
-                start_time_str = ''.join([f'{b >> 4}{b & 0x0F}' for b in start_time_bytes])
+            for i, fields in enumerate(entry_struct.iter_unpack(entries)):
+                channel, start_time_bytes, end_time_bytes, alarm_type, video_type = fields[:5]
                 
-                # Parse end time (BCD: YYMMDDHHmmss)
-                end_time_bytes = body[offset+7:offset+13]
-                end_time_str = ''.join([f'{b >> 4}{b & 0x0F}' for b in end_time_bytes])
-                
-                # Parse alarm type
-                alarm_type = struct.unpack('>I', body[offset+13:offset+17])[0]
-                
-                # Parse video type
-                video_type = struct.unpack('>B', body[offset+17:offset+18])[0]
+                # Parse start/end time (BCD: YYMMDDHHmmss)
+                start_time_str = bcd_to_str(start_time_bytes)
+                end_time_str = bcd_to_str(end_time_bytes)
                 
                 video_entry = {
                     'channel': channel,
@@ -779,9 +893,9 @@ class JT808Parser:
                     'index': i
                 }
                 
-                # Parse file size if present (22-byte format)
-                if has_file_size and offset + 22 <= len(body):
-                    file_size = struct.unpack('>I', body[offset+18:offset+22])[0]
+                # File size if present (22-byte format)
+                if has_file_size:
+                    file_size = fields[5]
                     video_entry['file_size'] = file_size
                     print(f"[PROTOCOL]   Video {i}: Channel={channel}, Time={start_time_str} to {end_time_str}, "
                           f"Alarm=0x{alarm_type:08X}, Type={video_type}, Size={file_size} bytes")
@@ -790,7 +904,11 @@ class JT808Parser:
                           f"Alarm=0x{alarm_type:08X}, Type={video_type}")
                 
                 videos.append(video_entry)
-                offset += entry_size
+            
+            if complete < video_count:
+                offset = 2 + complete * entry_size
+                print(f"[PROTOCOL] Warning: Incomplete video list, expected {video_count} videos but only {len(videos)} complete")
+                print(f"[PROTOCOL]   Remaining bytes: {len(body) - offset}, need {entry_size} for entry {complete+1}")
             
             print(f"[PROTOCOL] ✓ Successfully parsed video list: {len(videos)} videos (entry_size={entry_size} bytes)")
             return {
@@ -804,7 +922,7 @@ class JT808Parser:
             print(f"[ERROR] Body size: {len(body)} bytes")
             if len(body) >= 2:
                 try:
-                    count = struct.unpack('>H', body[0:2])[0]
+                    count = _U16.unpack_from(body, 0)[0]
                     print(f"[ERROR] Video count field: {count}")
                 except:
                     pass
@@ -818,33 +936,19 @@ class JT808Parser:
             return None
         
         # Parse video upload message (0x1205)
-        logic_channel = struct.unpack('>B', body[0:1])[0]
-        data_type = struct.unpack('>B', body[1:2])[0]  # 0=AV, 1=Video, 2=Audio, 3=Video+Audio
-        stream_type = struct.unpack('>B', body[2:3])[0]  # 0=Main, 1=Sub
-        codec_type = struct.unpack('>B', body[3:4])[0]  # 0=H.264
-        
-        # GPS data (28 bytes)
-        alarm_flag = struct.unpack('>I', body[4:8])[0]
-        status = struct.unpack('>I', body[8:12])[0]
-        latitude = struct.unpack('>I', body[12:16])[0] / 1000000.0
-        longitude = struct.unpack('>I', body[16:20])[0] / 1000000.0
-        altitude = struct.unpack('>H', body[20:22])[0]
-        speed = struct.unpack('>H', body[22:24])[0] / 10.0
-        direction = struct.unpack('>H', body[24:26])[0]
+        # data_type: 0=AV, 1=Video, 2=Audio, 3=Video+Audio; stream_type: 0=Main,
+        # 1=Sub; codec_type: 0=H.264; followed by GPS data (28 bytes)
+        (logic_channel, data_type, stream_type, codec_type,
+         alarm_flag, status, latitude_raw, longitude_raw,
+         altitude, speed_raw, direction) = _VIDEO_FIXED.unpack_from(body)
+        latitude = latitude_raw / 1000000.0
+        longitude = longitude_raw / 1000000.0
+        speed = speed_raw / 10.0
         time = body[26:32]  # BCD time format
         
-        # Video data
-        video_data = body[36:]
-        
-        return {
-            'logic_channel': logic_channel,
-            'data_type': data_type,
-            'stream_type': stream_type,
-            'codec_type': codec_type,
-            'latitude': latitude,
-            'longitude': longitude,
-            'altitude': altitude,
-            'speed': speed,
-            'direction': direction,
-            'video_data': video_data
-        }
+        # Video data: a view into body so the payload is not copied again
+        # (sendall/write/b''.join accept it as is)
+        video_data = memoryview(body)[36:]
+        
+        return VideoData(logic_channel, data_type, stream_type, codec_type,
+                         latitude, longitude, altitude, speed, direction, video_data)
@@ -22,22 +22,48 @@ import os
 import sys
 import time
 import struct
-from jt808_protocol import JT808Parser, MSG_ID_REGISTER, MSG_ID_HEARTBEAT, MSG_ID_TERMINAL_AUTH, MSG_ID_VIDEO_UPLOAD, MSG_ID_VIDEO_UPLOAD_INIT, MSG_ID_LOCATION_UPLOAD, MSG_ID_TERMINAL_RESPONSE, MSG_ID_TERMINAL_LOGOUT, MSG_ID_VIDEO_REALTIME_REQUEST, MSG_ID_VIDEO_DATA, MSG_ID_VIDEO_DATA_CONTROL, MSG_ID_VIDEO_LIST_QUERY, MSG_ID_VIDEO_DOWNLOAD_REQUEST
+import ipaddress
+from jt808_protocol import JT808Parser, bcd_to_str, MSG_ID_REGISTER, MSG_ID_HEARTBEAT, MSG_ID_TERMINAL_AUTH, MSG_ID_VIDEO_UPLOAD, MSG_ID_VIDEO_UPLOAD_INIT, MSG_ID_LOCATION_UPLOAD, MSG_ID_TERMINAL_RESPONSE, MSG_ID_TERMINAL_LOGOUT, MSG_ID_VIDEO_REALTIME_REQUEST, MSG_ID_VIDEO_DATA, MSG_ID_VIDEO_DATA_CONTROL, MSG_ID_VIDEO_LIST_QUERY, MSG_ID_VIDEO_DOWNLOAD_REQUEST
 from video_streamer import stream_manager
 
 HOST = "0.0.0.0"
 JT808_PORT = int(os.environ.get('JT808_PORT', 2222))
+# Environment settings are read (and validated) once at import
+VIDEO_SERVER_IP = os.environ.get('VIDEO_SERVER_IP', '82.180.145.220')  # Used when bound to 0.0.0.0
+# Normalise once at startup (surrounding whitespace, zero-padded octets) so a
+# bad value fails here instead of on every 0x9101 video request
+try:
+    VIDEO_SERVER_IP = str(ipaddress.IPv4Address('.'.join(str(int(part)) for part in VIDEO_SERVER_IP.strip().split('.'))))
+except ValueError:
+    print(f"[ERROR] Invalid VIDEO_SERVER_IP: {VIDEO_SERVER_IP!r} (expected an IPv4 address)")
+    sys.exit(1)
+VIDEO_PORT = int(os.environ.get('VIDEO_PORT', JT808_PORT))
+VIDEO_UDP_PORT = int(os.environ.get('VIDEO_UDP_PORT', JT808_PORT + 10))
+TRY_VIDEO_LIST_FIRST = os.environ.get('TRY_VIDEO_LIST_FIRST', 'false').lower() == 'true'
+RECV_BUFFER_SIZE = 65536  # Preallocated per-connection receive buffer
+UDP_RECV_BUFFER_SIZE = 65507  # Max UDP packet size
+MAX_BUFFER_BYTES = 1 << 20  # Unframed bytes allowed per connection before disconnecting
+# Per-message/per-datagram hex dumps (formatting them costs more than parsing)
+HEX_DUMP = os.environ.get('HEX_DUMP', 'false').lower() == 'true'
+# Routine per-message lines (every message, heartbeat/location acks, video packets)
+TRACE_MESSAGES = os.environ.get('TRACE_MESSAGES', 'false').lower() == 'true'
+
+# JTT1078 real-time video data types
+VIDEO_DATA_TYPE_NAMES = {0: 'I-frame', 1: 'P-frame', 2: 'B-frame', 3: 'Audio'}
 
 # Global connection tracking
 device_connections = {}  # device_id -> list of connections
 ip_connections = {}  # device_ip -> list of connections (track by IP address)
 connection_lock = threading.Lock()
 
+# Shared parser instance (JT808Parser keeps no per-connection state)
+jt808_parser = JT808Parser()
+
 class DeviceHandler:
     def __init__(self, conn, addr):
         self.conn = conn
         self.addr = addr
-        self.parser = JT808Parser()
+        self.parser = jt808_parser
         self.device_id = None
         self.authenticated = False
         self.video_request_sent = False  # Track if video request already sent
@@ -71,19 +97,20 @@ class DeviceHandler:
         self._location_message_count = 0  # Count location messages received
         self._video_list_query_in_progress = False  # Track if query is currently in progress
         self._timeout_check_thread = None  # Background thread for timeout checking
+        self._location_video_request_pending = False  # Delayed video request thread already scheduled
         
     def handle_message(self, msg, raw_message=None):
         """Handle parsed JTT 808/1078 messages"""
-        msg_id = msg['msg_id']
-        phone = msg['phone']
-        msg_seq = msg['msg_seq']
-        body = msg.get('body', b'')
+        msg_id = msg.msg_id
+        phone = msg.phone
+        msg_seq = msg.msg_seq
+        body = msg.body
         
         self.message_count += 1
         
         # Log all 0x1205 messages for video list debugging
         if msg_id == MSG_ID_VIDEO_UPLOAD:
-            msg_attr = msg.get('msg_attr', 0)
+            msg_attr = msg.msg_attr
             # Check fragmentation flag (bit 13 of message attribute)
             is_fragmented = (msg_attr & 0x2000) != 0
             packet_total = ((msg_attr >> 14) & 0x3FF) if is_fragmented else 1
@@ -104,10 +131,11 @@ class DeviceHandler:
                         pass
         
         # Enhanced logging with hex dump for debugging
-        print(f"[MSG #{self.message_count}] ID=0x{msg_id:04X}, Phone={phone}, Seq={msg_seq}, BodyLen={len(body)}")
+        if TRACE_MESSAGES:
+            print(f"[MSG #{self.message_count}] ID=0x{msg_id:04X}, Phone={phone}, Seq={msg_seq}, BodyLen={len(body)}")
         
-        # Comprehensive hex dump with byte structure
-        if raw_message:
+        # Comprehensive hex dump with byte structure (only built when enabled)
+        if HEX_DUMP and raw_message:
             hex_dump = binascii.hexlify(raw_message).decode()
             print(f"[HEX FULL] {hex_dump}")
             
@@ -118,7 +146,7 @@ class DeviceHandler:
                 if len(body) >= 13:
                     print(f"[HEX STRUCT] 0x{msg_id:04X} body: [Channel(1)={body[0]:02X}][DataType(1)={body[1]:02X}][PkgType(1)={body[2]:02X}][Time(6)={binascii.hexlify(body[3:9]).decode()}][Interval(2)={binascii.hexlify(body[9:11]).decode()}][Size(2)={binascii.hexlify(body[11:13]).decode()}][Data({len(body)-13})]")
         
-        if raw_message and len(raw_message) <= 200:  # Show formatted hex for small messages
+        if HEX_DUMP and raw_message and len(raw_message) <= 200:  # Show formatted hex for small messages
             hex_dump = binascii.hexlify(raw_message).decode()
             # Format as bytes with spacing
             formatted_hex = ' '.join([hex_dump[i:i+2] for i in range(0, len(hex_dump), 2)])
@@ -187,444 +215,351 @@ class DeviceHandler:
                             print(f"[CONN] Existing connection from {device_ip} has received video packets - this might be a control connection")
                             break
         
-        # Handle terminal general response (0x0001)
-        if msg_id == MSG_ID_TERMINAL_RESPONSE:
-            response_info = self.parser.parse_terminal_response(body)
-            if response_info:
-                reply_id = response_info['reply_id']
-                print(f"[RESPONSE] Device={phone} acknowledged message ID=0x{reply_id:04X}, "
-                      f"Serial={response_info['reply_serial']}, Result={response_info['result_text']}")
+        # Dispatch to the per-message handler
+        handler = _MESSAGE_HANDLERS[msg_id]
+        if handler is None:
+            handler = DeviceHandler._handle_unknown_message
+        handler(self, msg_id, phone, msg_seq, body)
+    
+    def _handle_terminal_response(self, msg_id, phone, msg_seq, body):
+        """Handle terminal general response (0x0001)"""
+        response_info = self.parser.parse_terminal_response(body)
+        if response_info:
+            reply_id = response_info.reply_id
+            print(f"[RESPONSE] Device={phone} acknowledged message ID=0x{reply_id:04X}, "
+                  f"Serial={response_info.reply_serial}, Result={response_info.result_text}")
+            
+            # If this is a response to video request (0x9101), send video control command
+            if reply_id == MSG_ID_VIDEO_REALTIME_REQUEST:
+                elapsed = None
+                if self.video_request_time:
+                    elapsed = time.time() - self.video_request_time
+                    print(f"[VIDEO FLOW] Video request response received {elapsed:.2f} seconds after request")
                 
-                # If this is a response to video request (0x9101), send video control command
-                if reply_id == MSG_ID_VIDEO_REALTIME_REQUEST:
-                    elapsed = None
-                    if self.video_request_time:
-                        elapsed = time.time() - self.video_request_time
-                        print(f"[VIDEO FLOW] Video request response received {elapsed:.2f} seconds after request")
+                if response_info.result_text != 'Success/Confirmation':
+                    print(f"[WARNING] Video request was not successful, result: {response_info.result_text}")
+                else:
+                    print(f"[VIDEO FLOW] ✓ Video request (0x9101) acknowledged successfully")
+                    print(f"[VIDEO FLOW] → Next step: Sending video control command (0x9202)...")
                     
-                    if response_info['result_text'] != 'Success/Confirmation':
-                        print(f"[WARNING] Video request was not successful, result: {response_info['result_text']}")
-                    else:
-                        print(f"[VIDEO FLOW] ✓ Video request (0x9101) acknowledged successfully")
-                        print(f"[VIDEO FLOW] → Next step: Sending video control command (0x9202)...")
-                        
-                        # Send video control command (0x9202) to start video streaming
-                        if self.conn and not self.video_control_sent:
-                            # Get channel from last video request attempt
-                            channel = 1  # Default channel
-                            if self.video_request_attempts:
-                                last_attempt = self.video_request_attempts[-1]
-                                channel = last_attempt.get('channel', 1)
-                                print(f"[VIDEO FLOW] Using channel={channel} from last video request attempt")
-                            
-                            # Send control command to start video (control_type=1: Switch code stream)
-                            self.send_video_control_command(phone, msg_seq, channel, control_type=1)
-                        else:
-                            if not self.conn:
-                                print(f"[VIDEO FLOW] ⚠️ Cannot send control command: no connection")
-                            elif self.video_control_sent:
-                                print(f"[VIDEO FLOW] ⚠️ Control command already sent, skipping")
-                        
-                        # Send a keep-alive heartbeat to maintain connection
-                        if self.conn:
-                            try:
-                                heartbeat = self.parser.build_heartbeat_response(phone, msg_seq + 1)
-                                self.conn.send(heartbeat)
-                                print(f"[VIDEO FLOW] Sent keep-alive heartbeat after video acknowledgment")
-                            except Exception as e:
-                                print(f"[VIDEO FLOW] Failed to send heartbeat: {e}")
-                
-                # If this is a response to video control command (0x9202)
-                elif reply_id == MSG_ID_VIDEO_DATA_CONTROL:
-                    elapsed = None
-                    if self.video_control_time:
-                        elapsed = time.time() - self.video_control_time
-                        print(f"[VIDEO FLOW] Control command response received {elapsed:.2f} seconds after command")
+                    # Keep-alive heartbeat to maintain connection (coalesced with the control command)
+                    heartbeat = self.parser.build_heartbeat_response(phone, msg_seq + 1)
                     
-                    if response_info['result_text'] != 'Success/Confirmation':
-                        print(f"[WARNING] Video control command was not successful, result: {response_info['result_text']}")
-                    else:
-                        print(f"[VIDEO FLOW] ✓ Video control command (0x9202) acknowledged successfully")
-                        print(f"[VIDEO FLOW] → Next step: Waiting for video data packets (0x9201)...")
-                        self.video_control_time = time.time()
-                        # Now device should start sending video data (0x9201)
-                        print(f"[VIDEO FLOW] Monitoring for video packets on TCP connection and UDP port {JT808_PORT}")
-            else:
-                print(f"[RESPONSE] Failed to parse terminal response from {phone}")
-                print(f"[RESPONSE] Body hex: {binascii.hexlify(body).decode()}")
-            # No response needed - this IS a response message
-        
-        # Handle terminal logout (0x0003)
-        elif msg_id == MSG_ID_TERMINAL_LOGOUT:
-            print(f"[LOGOUT] Device {phone} is logging out")
-            # Send logout response
-            response = self.parser.build_logout_response(phone, msg_seq, 0)
-            self.conn.send(response)
-            print(f"[TX] Logout response sent")
-        
-        # Handle registration (0x0100)
-        # JTT808 Protocol Format (Message Body):
-        # - Bytes 0-1: Province ID (2 bytes)
-        # - Bytes 2-3: City/County ID (2 bytes)
-        # - Bytes 4-8: Manufacturer ID (5 bytes, ASCII)
-        # - Bytes 9-28: Terminal model (20 bytes, ASCII, null-padded)
-        # - Bytes 29-44: Terminal ID (16 bytes, ASCII, null-padded)
-        # - Byte 45: License plate color (1 byte)
-        # - Bytes 46+: License plate number (variable, ASCII)
-        elif msg_id == MSG_ID_REGISTER:
-            print(f"[+] Device registration from {phone}")
-            was_new_device = self.device_id is None
-            self.device_id = phone
-            response = self.parser.build_register_response(phone, msg_seq, 0)
-            self.conn.send(response)
-            print(f"[TX] Registration response sent")
-            
-            # Query video list after registration (device is now identified)
-            if was_new_device:
-                print(f"[AUTO QUERY] New device {phone} registered, will query video list after short delay...")
-                def query_after_registration():
-                    time.sleep(2.0)  # Wait 2 seconds for device to be ready
-                    if self.conn and self.device_id == phone and not self.video_list_received:
-                        print(f"[AUTO QUERY] Sending video list query to newly registered device {phone}")
-                        self.query_video_list(phone, self.message_count)
+                    # Send video control command (0x9202) to start video streaming
+                    if self.conn and not self.video_control_sent:
+                        # Get channel from last video request attempt
+                        channel = 1  # Default channel
+                        if self.video_request_attempts:
+                            last_attempt = self.video_request_attempts[-1]
+                            channel = last_attempt.get('channel', 1)
+                            print(f"[VIDEO FLOW] Using channel={channel} from last video request attempt")
+                        
+                        # Send control command to start video (control_type=1: Switch code stream)
+                        # The heartbeat rides along only if the write succeeded;
+                        # otherwise it is still sent on its own below
+                        if self.send_video_control_command(phone, msg_seq, channel, control_type=1, followed_by=heartbeat):
+                            heartbeat = None
+                            print(f"[VIDEO FLOW] Sent keep-alive heartbeat after video acknowledgment")
                     else:
-                        print(f"[AUTO QUERY] Device state changed, skipping query")
+                        if not self.conn:
+                            print(f"[VIDEO FLOW] ⚠️ Cannot send control command: no connection")
+                        elif self.video_control_sent:
+                            print(f"[VIDEO FLOW] ⚠️ Control command already sent, skipping")
+                    
+                    # Send a keep-alive heartbeat to maintain connection
+                    if self.conn and heartbeat:
+                        try:
+                            self.conn.send(heartbeat)
+                            print(f"[VIDEO FLOW] Sent keep-alive heartbeat after video acknowledgment")
+                        except Exception as e:
+                            print(f"[VIDEO FLOW] Failed to send heartbeat: {e}")
+            
+            # If this is a response to video control command (0x9202)
+            elif reply_id == MSG_ID_VIDEO_DATA_CONTROL:
+                elapsed = None
+                if self.video_control_time:
+                    elapsed = time.time() - self.video_control_time
+                    print(f"[VIDEO FLOW] Control command response received {elapsed:.2f} seconds after command")
                 
-                threading.Thread(target=query_after_registration, daemon=True).start()
-        
-        # Handle heartbeat (0x0002)
-        elif msg_id == MSG_ID_HEARTBEAT:
-            response = self.parser.build_heartbeat_response(phone, msg_seq)
-            self.conn.send(response)
+                if response_info.result_text != 'Success/Confirmation':
+                    print(f"[WARNING] Video control command was not successful, result: {response_info.result_text}")
+                else:
+                    print(f"[VIDEO FLOW] ✓ Video control command (0x9202) acknowledged successfully")
+                    print(f"[VIDEO FLOW] → Next step: Waiting for video data packets (0x9201)...")
+                    self.video_control_time = time.time()
+                    # Now device should start sending video data (0x9201)
+                    print(f"[VIDEO FLOW] Monitoring for video packets on TCP connection and UDP port {JT808_PORT}")
+        else:
+            print(f"[RESPONSE] Failed to parse terminal response from {phone}")
+            print(f"[RESPONSE] Body hex: {binascii.hexlify(body).decode()}")
+        # No response needed - this IS a response message
+    
+    def _handle_terminal_logout(self, msg_id, phone, msg_seq, body):
+        """Handle terminal logout (0x0003)"""
+        print(f"[LOGOUT] Device {phone} is logging out")
+        # Send logout response
+        response = self.parser.build_logout_response(phone, msg_seq, 0)
+        self.conn.send(response)
+        print(f"[TX] Logout response sent")
+    
+    def _handle_register(self, msg_id, phone, msg_seq, body):
+        """
+        Handle registration (0x0100)
+        JTT808 Protocol Format (Message Body):
+        - Bytes 0-1: Province ID (2 bytes)
+        - Bytes 2-3: City/County ID (2 bytes)
+        - Bytes 4-8: Manufacturer ID (5 bytes, ASCII)
+        - Bytes 9-28: Terminal model (20 bytes, ASCII, null-padded)
+        - Bytes 29-44: Terminal ID (16 bytes, ASCII, null-padded)
+        - Byte 45: License plate color (1 byte)
+        - Bytes 46+: License plate number (variable, ASCII)
+        """
+        print(f"[+] Device registration from {phone}")
+        was_new_device = self.device_id is None
+        self.device_id = phone
+        response = self.parser.build_register_response(phone, msg_seq, 0)
+        self.conn.send(response)
+        print(f"[TX] Registration response sent")
+        
+        # Query video list after registration (device is now identified)
+        if was_new_device:
+            print(f"[AUTO QUERY] New device {phone} registered, will query video list after short delay...")
+            def query_after_registration():
+                time.sleep(2.0)  # Wait 2 seconds for device to be ready
+                if self.conn and self.device_id == phone and not self.video_list_received:
+                    print(f"[AUTO QUERY] Sending video list query to newly registered device {phone}")
+                    self.query_video_list(phone, self.message_count)
+                else:
+                    print(f"[AUTO QUERY] Device state changed, skipping query")
+            
+            threading.Thread(target=query_after_registration, daemon=True).start()
+    
+    def _handle_heartbeat(self, msg_id, phone, msg_seq, body):
+        """Handle heartbeat (0x0002)"""
+        response = self.parser.build_heartbeat_response(phone, msg_seq)
+        self.conn.send(response)
+        if TRACE_MESSAGES:
             print(f"[TX] Heartbeat response sent")
-        
-        # Handle authentication (0x0102)
-        # JTT808 Protocol Format (Message Body):
-        # - Bytes 0-15: Authentication code (16 bytes, ASCII, null-padded)
-        # Note: Some devices send minimal body (1 byte)
-        elif msg_id == MSG_ID_TERMINAL_AUTH:
-            print(f"[+] Authentication request from {phone}")
-            # Extract authentication code from body
-            auth_code = body[:8] if len(body) >= 8 else b''
-            # For demo, accept all authentications
-            was_authenticated = self.authenticated
-            self.authenticated = True
-            response = self.parser.build_auth_response(phone, msg_seq, 0)
-            self.conn.send(response)
-            print(f"[TX] Authentication response sent")
-            
-            # Automatically query video list after successful authentication
-            if not was_authenticated:
-                print(f"[AUTO QUERY] Device {phone} authenticated, automatically querying video list...")
-                # Wait a short moment for device to be ready, then query
-                def auto_query_video_list():
-                    time.sleep(1.0)  # Wait 1 second for device to be ready
-                    if self.conn and self.authenticated:
-                        print(f"[AUTO QUERY] Sending automatic video list query to {phone}")
-                        self.query_video_list(phone, self.message_count)
-                    else:
-                        print(f"[AUTO QUERY] Connection lost or device not authenticated, skipping auto query")
-                
-                threading.Thread(target=auto_query_video_list, daemon=True).start()
-            
-            # Try sending video request with multiple configurations
-            if not was_authenticated and not self.video_request_sent:
-                # Try querying video list first, then request video
-                # Some devices need this sequence
-                try_video_list = os.environ.get('TRY_VIDEO_LIST_FIRST', 'false').lower() == 'true'
-                if try_video_list:
-                    threading.Thread(target=self.try_video_request, args=(phone, msg_seq, True), daemon=True).start()
+    
+    def _handle_terminal_auth(self, msg_id, phone, msg_seq, body):
+        """
+        Handle authentication (0x0102)
+        JTT808 Protocol Format (Message Body):
+        - Bytes 0-15: Authentication code (16 bytes, ASCII, null-padded)
+        Note: Some devices send minimal body (1 byte)
+        """
+        print(f"[+] Authentication request from {phone}")
+        # Extract authentication code from body
+        auth_code = body[:8] if len(body) >= 8 else b''
+        # For demo, accept all authentications
+        was_authenticated = self.authenticated
+        self.authenticated = True
+        response = self.parser.build_auth_response(phone, msg_seq, 0)
+        self.conn.send(response)
+        print(f"[TX] Authentication response sent")
+        
+        # Automatically query video list after successful authentication
+        if not was_authenticated:
+            print(f"[AUTO QUERY] Device {phone} authenticated, automatically querying video list...")
+            # Wait a short moment for device to be ready, then query
+            def auto_query_video_list():
+                time.sleep(1.0)  # Wait 1 second for device to be ready
+                if self.conn and self.authenticated:
+                    print(f"[AUTO QUERY] Sending automatic video list query to {phone}")
+                    self.query_video_list(phone, self.message_count)
                 else:
-                    self.try_video_request(phone, msg_seq, False)
-            elif was_authenticated:
-                print(f"[INFO] Device {phone} re-authenticated (video request already sent)")
-        
-        # Handle location data upload (0x0200)
-        elif msg_id == MSG_ID_LOCATION_UPLOAD:
-            location_info = self.parser.parse_location_data(body)
-            if location_info:
-                time_str = (f"{location_info['time']['year']:04d}-"
-                           f"{location_info['time']['month']:02d}-"
-                           f"{location_info['time']['day']:02d} "
-                           f"{location_info['time']['hour']:02d}:"
-                           f"{location_info['time']['minute']:02d}:"
-                           f"{location_info['time']['second']:02d}")
-                
-                print(f"[LOCATION] Device={phone}, "
-                      f"GPS=({location_info['latitude']:.6f}, {location_info['longitude']:.6f}), "
-                      f"Speed={location_info['speed']:.1f} km/h, "
-                      f"Direction={location_info['direction']}°, "
-                      f"Altitude={location_info['altitude']}m, "
-                      f"Time={time_str}, "
-                      f"Alarm=0x{location_info['alarm_flag']:08X}, "
-                      f"Status=0x{location_info['status']:08X}")
-                
-                # Send response
-                response = self.parser.build_location_response(phone, msg_seq, 0)
-                self.conn.send(response)
+                    print(f"[AUTO QUERY] Connection lost or device not authenticated, skipping auto query")
+            
+            threading.Thread(target=auto_query_video_list, daemon=True).start()
+        
+        # Try sending video request with multiple configurations
+        if not was_authenticated and not self.video_request_sent:
+            # Try querying video list first, then request video
+            # Some devices need this sequence
+            if TRY_VIDEO_LIST_FIRST:
+                threading.Thread(target=self.try_video_request, args=(phone, msg_seq, True), daemon=True).start()
+            else:
+                self.try_video_request(phone, msg_seq, False)
+        elif was_authenticated:
+            print(f"[INFO] Device {phone} re-authenticated (video request already sent)")
+    
+    def _handle_location_upload(self, msg_id, phone, msg_seq, body):
+        """Handle location data upload (0x0200)"""
+        location_info = self.parser.parse_location_data(body)
+        if location_info:
+            time_str = (f"{location_info.time.year:04d}-"
+                       f"{location_info.time.month:02d}-"
+                       f"{location_info.time.day:02d} "
+                       f"{location_info.time.hour:02d}:"
+                       f"{location_info.time.minute:02d}:"
+                       f"{location_info.time.second:02d}")
+            
+            print(f"[LOCATION] Device={phone}, "
+                  f"GPS=({location_info.latitude:.6f}, {location_info.longitude:.6f}), "
+                  f"Speed={location_info.speed:.1f} km/h, "
+                  f"Direction={location_info.direction}°, "
+                  f"Altitude={location_info.altitude}m, "
+                  f"Time={time_str}, "
+                  f"Alarm=0x{location_info.alarm_flag:08X}, "
+                  f"Status=0x{location_info.status:08X}")
+            
+            # Send response
+            response = self.parser.build_location_response(phone, msg_seq, 0)
+            self.conn.send(response)
+            
+            # Increment location message count
+            self._location_message_count += 1
+            if TRACE_MESSAGES:
                 print(f"[TX] Location response sent")
-                
-                # Increment location message count
-                self._location_message_count += 1
                 print(f"[LOCATION] Location message count: {self._location_message_count}")
-                
-                # Query video list if device is active but list not received
-                # This works even without authentication (some devices don't authenticate)
-                can_query = (
-                    self.device_id and  # Device is identified
-                    not self.video_list_received and  # Haven't received video list yet
-                    self.conn  # Connection is still active
-                )
-                
-                print(f"[AUTO QUERY] Checking conditions: device_id={self.device_id}, video_list_received={self.video_list_received}, conn={bool(self.conn)}, can_query={can_query}")
-                
-                # Check cooldown
-                query_allowed = True
-                if self._video_list_query_attempted is not None:
-                    elapsed = time.time() - self._video_list_query_attempted
-                    if elapsed < self._video_list_query_cooldown:
-                        query_allowed = False
-                        print(f"[AUTO QUERY] Cooldown active: {elapsed:.1f}s since last query (need {self._video_list_query_cooldown}s)")
-                
-                # Query after a few location messages (device is clearly active)
-                # Or if enough time has passed since last query
-                if can_query and query_allowed:
-                    # Query after 2-3 location messages to ensure device is active
-                    if self._location_message_count >= 2:
-                        print(f"[AUTO QUERY] Device {phone} is active ({self._location_message_count} location messages), querying video list...")
-                        self._video_list_query_attempted = time.time()
-                        
-                        def query_after_delay():
-                            time.sleep(0.5)  # Small delay to ensure device is ready
-                            if self.conn and self.device_id:
-                                print(f"[AUTO QUERY] Sending video list query to active device {phone}")
-                                self.query_video_list(phone, self.message_count)
-                            else:
-                                print(f"[AUTO QUERY] Connection lost, skipping query")
-                        
-                        threading.Thread(target=query_after_delay, daemon=True).start()
-                    else:
-                        print(f"[AUTO QUERY] Waiting for more location messages ({self._location_message_count}/2)")
+            
+            # Query video list if device is active but list not received
+            # This works even without authentication (some devices don't authenticate)
+            can_query = (
+                self.device_id and  # Device is identified
+                not self.video_list_received and  # Haven't received video list yet
+                self.conn  # Connection is still active
+            )
+            
+            print(f"[AUTO QUERY] Checking conditions: device_id={self.device_id}, video_list_received={self.video_list_received}, conn={bool(self.conn)}, can_query={can_query}")
+            
+            # Check cooldown
+            query_allowed = True
+            if self._video_list_query_attempted is not None:
+                elapsed = time.time() - self._video_list_query_attempted
+                if elapsed < self._video_list_query_cooldown:
+                    query_allowed = False
+                    print(f"[AUTO QUERY] Cooldown active: {elapsed:.1f}s since last query (need {self._video_list_query_cooldown}s)")
+            
+            # Query after a few location messages (device is clearly active)
+            # Or if enough time has passed since last query
+            if can_query and query_allowed:
+                # Query after 2-3 location messages to ensure device is active
+                if self._location_message_count >= 2:
+                    print(f"[AUTO QUERY] Device {phone} is active ({self._location_message_count} location messages), querying video list...")
+                    self._video_list_query_attempted = time.time()
+                    
+                    def query_after_delay():
+                        time.sleep(0.5)  # Small delay to ensure device is ready
+                        if self.conn and self.device_id:
+                            print(f"[AUTO QUERY] Sending video list query to active device {phone}")
+                            self.query_video_list(phone, self.message_count)
+                        else:
+                            print(f"[AUTO QUERY] Connection lost, skipping query")
+                    
+                    threading.Thread(target=query_after_delay, daemon=True).start()
                 else:
-                    if not can_query:
-                        print(f"[AUTO QUERY] Cannot query: device_id={self.device_id}, video_list_received={self.video_list_received}, conn={bool(self.conn)}")
-                    if not query_allowed:
-                        print(f"[AUTO QUERY] Query not allowed due to cooldown")
-                
-                # Try sending video request after location data (some devices need this)
-                if not self.video_request_sent and self.authenticated:
-                    print(f"[INFO] Trying video request after location data...")
-                    threading.Thread(target=self.try_video_request_after_location, args=(phone, msg_seq), daemon=True).start()
+                    print(f"[AUTO QUERY] Waiting for more location messages ({self._location_message_count}/2)")
             else:
-                print(f"[LOCATION] Failed to parse location data from {phone}")
-        
-        # Handle video list response (0x1205 as response to 0x9205)
-        # Try to detect video list response by structure, not just query flag
-        # Note: Some devices send count-only messages (6 bytes) but may not send
-        # actual video entries. The buffer logic handles this by waiting for entries
-        # and timing out if they don't arrive. Protocol parameters (0xFF for all
-        # channels/types, 0xFFFFFFFFFFFF for no time limits) are correct per JTT1078.
-        elif msg_id == MSG_ID_VIDEO_UPLOAD:
+                if not can_query:
+                    print(f"[AUTO QUERY] Cannot query: device_id={self.device_id}, video_list_received={self.video_list_received}, conn={bool(self.conn)}")
+                if not query_allowed:
+                    print(f"[AUTO QUERY] Query not allowed due to cooldown")
+            
+            # Try sending video request after location data (some devices need this)
+            # Only one delayed attempt at a time, not one thread per location message
+            if not self.video_request_sent and self.authenticated and not self._location_video_request_pending:
+                print(f"[INFO] Trying video request after location data...")
+                self._location_video_request_pending = True
+                threading.Thread(target=self.try_video_request_after_location, args=(phone, msg_seq), daemon=True).start()
+        else:
+            print(f"[LOCATION] Failed to parse location data from {phone}")
+    
+    def _handle_video_upload(self, msg_id, phone, msg_seq, body):
+        """
+        Handle video list response (0x1205 as response to 0x9205)
+        Try to detect video list response by structure, not just query flag
+        Note: Some devices send count-only messages (6 bytes) but may not send
+        actual video entries. The buffer logic handles this by waiting for entries
+        and timing out if they don't arrive. Protocol parameters (0xFF for all
+        channels/types, 0xFFFFFFFFFFFF for no time limits) are correct per JTT1078.
+        """
+        # #region agent log
+        import json
+        try:
+            with open(r'c:\Mine\Projects\DASHCAM\.cursor\debug.log', 'a') as f:
+                f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"server.py:427","message":"0x1205 message received","data":{"msg_id":hex(msg_id),"body_len":len(body),"video_list_count":self.video_list_count,"query_in_progress":self._video_list_query_in_progress,"buffer_size":len(self.video_list_buffer) if self.video_list_buffer else 0,"received_time":self.video_list_received_time},"timestamp":int(time.time()*1000)}) + '\n')
+        except: pass
+        # #endregion
+        # Check for timeout on existing buffer
+        if self.video_list_count is not None and self.video_list_received_time is not None:
+            elapsed = time.time() - self.video_list_received_time
             # #region agent log
-            import json
             try:
                 with open(r'c:\Mine\Projects\DASHCAM\.cursor\debug.log', 'a') as f:
-                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"server.py:427","message":"0x1205 message received","data":{"msg_id":hex(msg_id),"body_len":len(body),"video_list_count":self.video_list_count,"query_in_progress":self._video_list_query_in_progress,"buffer_size":len(self.video_list_buffer) if self.video_list_buffer else 0,"received_time":self.video_list_received_time},"timestamp":int(time.time()*1000)}) + '\n')
+                    f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"server.py:430","message":"Timeout check","data":{"elapsed":elapsed,"timeout":self.video_list_buffer_timeout,"timed_out":elapsed > self.video_list_buffer_timeout},"timestamp":int(time.time()*1000)}) + '\n')
             except: pass
             # #endregion
-            # Check for timeout on existing buffer
-            if self.video_list_count is not None and self.video_list_received_time is not None:
-                elapsed = time.time() - self.video_list_received_time
+            if elapsed > self.video_list_buffer_timeout:
+                print(f"[VIDEO LIST] ⚠️ Buffer timeout after {elapsed:.1f}s, expected {self.video_list_expected_size} bytes, got {len(self.video_list_buffer)} bytes")
+                print(f"[VIDEO LIST] Clearing incomplete buffer and trying to parse what we have...")
+                # Try to parse what we have
+                if len(self.video_list_buffer) >= 2:
+                    video_list = self.parser.parse_video_list_response(bytes(self.video_list_buffer))
+                    if video_list and 'videos' in video_list and len(video_list['videos']) > 0:
+                        print(f"[VIDEO LIST] ✓ Parsed partial list: {len(video_list['videos'])} videos from incomplete buffer")
+                        self.stored_videos = video_list['videos']
+                        self.video_list_received = True
+                # Reset buffer and query state
                 # #region agent log
                 try:
                     with open(r'c:\Mine\Projects\DASHCAM\.cursor\debug.log', 'a') as f:
-                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"server.py:430","message":"Timeout check","data":{"elapsed":elapsed,"timeout":self.video_list_buffer_timeout,"timed_out":elapsed > self.video_list_buffer_timeout},"timestamp":int(time.time()*1000)}) + '\n')
+                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"server.py:445","message":"Resetting buffer on timeout","data":{"before_query_in_progress":self._video_list_query_in_progress},"timestamp":int(time.time()*1000)}) + '\n')
                 except: pass
                 # #endregion
-                if elapsed > self.video_list_buffer_timeout:
-                    print(f"[VIDEO LIST] ⚠️ Buffer timeout after {elapsed:.1f}s, expected {self.video_list_expected_size} bytes, got {len(self.video_list_buffer)} bytes")
-                    print(f"[VIDEO LIST] Clearing incomplete buffer and trying to parse what we have...")
-                    # Try to parse what we have
-                    if len(self.video_list_buffer) >= 2:
-                        video_list = self.parser.parse_video_list_response(bytes(self.video_list_buffer))
-                        if video_list and 'videos' in video_list and len(video_list['videos']) > 0:
-                            print(f"[VIDEO LIST] ✓ Parsed partial list: {len(video_list['videos'])} videos from incomplete buffer")
-                            self.stored_videos = video_list['videos']
-                            self.video_list_received = True
-                    # Reset buffer and query state
-                    # #region agent log
-                    try:
-                        with open(r'c:\Mine\Projects\DASHCAM\.cursor\debug.log', 'a') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"server.py:445","message":"Resetting buffer on timeout","data":{"before_query_in_progress":self._video_list_query_in_progress},"timestamp":int(time.time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
-                    self.video_list_buffer = bytearray()
-                    self.video_list_count = None
-                    self.video_list_expected_size = None
-                    self.video_list_received_time = None
-                    self._video_list_query_in_progress = False
-                    # #region agent log
-                    try:
-                        with open(r'c:\Mine\Projects\DASHCAM\.cursor\debug.log', 'a') as f:
-                            f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"server.py:450","message":"Buffer reset complete","data":{"after_query_in_progress":self._video_list_query_in_progress},"timestamp":int(time.time()*1000)}) + '\n')
-                    except: pass
-                    # #endregion
-                    
-                    # After timeout, check if new incoming message is a count-only message
-                    # This will be handled by the new count detection logic above
-            
-            # FIRST: Check if this is a new count-only message (even if buffer exists)
-            # This handles the case where device sends a new query response while old buffer exists
-            if len(body) == 6:
+                self.video_list_buffer = bytearray()
+                self.video_list_count = None
+                self.video_list_expected_size = None
+                self.video_list_received_time = None
+                self._video_list_query_in_progress = False
+                # #region agent log
                 try:
-                    new_count = struct.unpack('>H', body[0:2])[0]
-                    remaining = body[2:6]
-                    if 0 < new_count <= 1000 and remaining == b'\x00\x00\x00\x00':
-                        # Check if this is different from current buffer or buffer timed out
-                        buffer_timed_out = False
-                        if self.video_list_received_time is not None:
-                            elapsed = time.time() - self.video_list_received_time
-                            if elapsed > self.video_list_buffer_timeout:
-                                buffer_timed_out = True
-                        
-                        is_new_response = (
-                            self.video_list_count is None or  # No buffer exists
-                            new_count != self.video_list_count or  # Different count
-                            buffer_timed_out  # Buffer timed out
-                        )
-                        
-                        if is_new_response:
-                            # New query response - reset buffer
-                            print(f"[VIDEO LIST BUFFER] New count message detected: {new_count} videos (resetting buffer)")
-                            if self.video_list_count is not None:
-                                print(f"[VIDEO LIST BUFFER] Previous buffer had count={self.video_list_count}, replacing with new count={new_count}")
-                            
-                            # Initialize buffer with count
-                            self.video_list_count = new_count
-                            self.video_list_buffer = bytearray(body[:2])  # Store just the count
-                            # Calculate expected size (try 18-byte format first)
-                            self.video_list_expected_size = 2 + (new_count * 18)
-                            self.video_list_received_time = time.time()
-                            self._video_list_query_in_progress = True
-                            
-                            # Start background timeout checker if not already running
-                            self._start_timeout_checker()
-                            
-                            print(f"[VIDEO LIST BUFFER] Buffer initialized: count={new_count}, expected_size={self.video_list_expected_size} bytes")
-                            print(f"[VIDEO LIST BUFFER] Waiting for {self.video_list_expected_size - 2} more bytes in subsequent messages...")
-                            
-                            # Acknowledge the count message
-                            try:
-                                response = self.parser.build_terminal_response(phone, msg_seq, MSG_ID_VIDEO_LIST_QUERY, 0)
-                                self.conn.send(response)
-                                print(f"[TX] Video list count message acknowledged, waiting for entries...")
-                            except Exception as e:
-                                print(f"[ERROR] Failed to send acknowledgment: {e}")
-                            
-                            return  # Don't process as continuation or video data
-                except Exception as e:
-                    # Not a count message, continue with normal processing
-                    pass
-            
-            # Check if we're already buffering (continuation message)
-            if self.video_list_count is not None:
-                # Reset timeout timer since we're receiving data
-                self.video_list_received_time = time.time()
-                
-                print(f"[VIDEO LIST BUFFER] Continuation message received: {len(body)} bytes")
-                print(f"[VIDEO LIST BUFFER] Current buffer: {len(self.video_list_buffer)} bytes (has count), expected: {self.video_list_expected_size} bytes")
-                
-                # Check if this continuation message also starts with count (device might repeat it)
-                # If so, skip the count bytes and only append the entries
-                if len(body) >= 2:
-                    try:
-                        body_count = struct.unpack('>H', body[0:2])[0]
-                        if body_count == self.video_list_count:
-                            # This message also has the count, skip it and append rest
-                            print(f"[VIDEO LIST BUFFER] Continuation message also contains count ({body_count}), skipping count bytes")
-                            self.video_list_buffer.extend(body[2:])  # Skip count, append entries
-                        else:
-                            # No count in this message, append entire body
-                            self.video_list_buffer.extend(body)
-                    except:
-                        # Can't parse count, just append entire body
-                        self.video_list_buffer.extend(body)
-                else:
-                    # Body too short, append as-is
-                    self.video_list_buffer.extend(body)
-                
-                print(f"[VIDEO LIST BUFFER] Buffer now: {len(self.video_list_buffer)} bytes")
+                    with open(r'c:\Mine\Projects\DASHCAM\.cursor\debug.log', 'a') as f:
+                        f.write(json.dumps({"sessionId":"debug-session","runId":"run1","hypothesisId":"A","location":"server.py:450","message":"Buffer reset complete","data":{"after_query_in_progress":self._video_list_query_in_progress},"timestamp":int(time.time()*1000)}) + '\n')
+                except: pass
+                # #endregion
                 
-                # Check if buffer is complete
-                if len(self.video_list_buffer) >= self.video_list_expected_size:
-                    print(f"[VIDEO LIST BUFFER] ✓ Buffer complete! Parsing video list...")
-                    video_list = self.parser.parse_video_list_response(bytes(self.video_list_buffer))
-                    if video_list and 'videos' in video_list:
-                        print(f"[VIDEO LIST] ✓ Video list response successfully parsed from {phone}: {video_list['video_count']} videos")
-                        self.stored_videos = video_list['videos']
-                        self.video_list_received = True
-                        
-                        # Log video details
-                        for video in self.stored_videos:
-                            print(f"[VIDEO LIST]   Video {video['index']}: Channel={video['channel']}, "
-                                  f"Time={video['start_time']} to {video['end_time']}, "
-                                  f"Alarm=0x{video['alarm_type']:08X}, Type={video['video_type']}")
-                        
-                        # Send response acknowledgment
-                        try:
-                            response = self.parser.build_terminal_response(phone, msg_seq, MSG_ID_VIDEO_LIST_QUERY, 0)
-                            self.conn.send(response)
-                            print(f"[TX] Video list response acknowledged")
-                        except Exception as e:
-                            print(f"[ERROR] Failed to send video list acknowledgment: {e}")
-                        
-                        # Clear buffer and reset query state
-                        self.video_list_buffer = bytearray()
-                        self.video_list_count = None
-                        self.video_list_expected_size = None
-                        self.video_list_received_time = None
-                        self._video_list_query_in_progress = False
-                        self._stop_timeout_checker()
-                        return
-                    else:
-                        print(f"[VIDEO LIST BUFFER] Parsing failed even with complete buffer")
-                        print(f"[VIDEO LIST BUFFER] Buffer content (first 50 bytes): {binascii.hexlify(self.video_list_buffer[:50]).decode()}")
-                        # Reset buffer on parse failure
-                        self.video_list_buffer = bytearray()
-                        self.video_list_count = None
-                        self.video_list_expected_size = None
-                        self.video_list_received_time = None
-                        self._video_list_query_in_progress = False
-                        self._stop_timeout_checker()
-                else:
-                    # Still waiting for more data
-                    remaining = self.video_list_expected_size - len(self.video_list_buffer)
-                    print(f"[VIDEO LIST BUFFER] Still waiting for {remaining} more bytes...")
-                    return  # Don't process as video data yet
-            
-            # Check if this is a new count-only message (first fragment)
-            # Device sends 6-byte message: count (2 bytes) + 4 bytes of zeros
-            if len(body) == 6 and len(body) >= 2:
-                try:
-                    video_count = struct.unpack('>H', body[0:2])[0]
-                    # Check if remaining bytes are zeros (typical pattern)
-                    remaining_bytes = body[2:6]
-                    if 0 < video_count <= 1000 and remaining_bytes == b'\x00\x00\x00\x00':
-                        print(f"[VIDEO LIST BUFFER] Detected count-only message: {video_count} videos")
-                        print(f"[VIDEO LIST BUFFER] Initializing buffer, expecting video entries in subsequent messages")
+                # After timeout, check if new incoming message is a count-only message
+                # This will be handled by the new count detection logic above
+        
+        # FIRST: Check if this is a new count-only message (even if buffer exists)
+        # This handles the case where device sends a new query response while old buffer exists
+        if len(body) == 6:
+            try:
+                new_count = struct.unpack('>H', body[0:2])[0]
+                remaining = body[2:6]
+                if 0 < new_count <= 1000 and remaining == b'\x00\x00\x00\x00':
+                    # Check if this is different from current buffer or buffer timed out
+                    buffer_timed_out = False
+                    if self.video_list_received_time is not None:
+                        elapsed = time.time() - self.video_list_received_time
+                        if elapsed > self.video_list_buffer_timeout:
+                            buffer_timed_out = True
+                    
+                    is_new_response = (
+                        self.video_list_count is None or  # No buffer exists
+                        new_count != self.video_list_count or  # Different count
+                        buffer_timed_out  # Buffer timed out
+                    )
+                    
+                    if is_new_response:
+                        # New query response - reset buffer
+                        print(f"[VIDEO LIST BUFFER] New count message detected: {new_count} videos (resetting buffer)")
+                        if self.video_list_count is not None:
+                            print(f"[VIDEO LIST BUFFER] Previous buffer had count={self.video_list_count}, replacing with new count={new_count}")
                         
                         # Initialize buffer with count
-                        self.video_list_count = video_count
+                        self.video_list_count = new_count
                         self.video_list_buffer = bytearray(body[:2])  # Store just the count
                         # Calculate expected size (try 18-byte format first)
-                        self.video_list_expected_size = 2 + (video_count * 18)
+                        self.video_list_expected_size = 2 + (new_count * 18)
                         self.video_list_received_time = time.time()
                         self._video_list_query_in_progress = True
                         
-                        # Start background timeout checker
+                        # Start background timeout checker if not already running
                         self._start_timeout_checker()
                         
-                        print(f"[VIDEO LIST BUFFER] Buffer initialized: count={video_count}, expected_size={self.video_list_expected_size} bytes")
+                        print(f"[VIDEO LIST BUFFER] Buffer initialized: count={new_count}, expected_size={self.video_list_expected_size} bytes")
                         print(f"[VIDEO LIST BUFFER] Waiting for {self.video_list_expected_size - 2} more bytes in subsequent messages...")
                         
                         # Acknowledge the count message
@@ -635,55 +570,44 @@ class DeviceHandler:
                         except Exception as e:
                             print(f"[ERROR] Failed to send acknowledgment: {e}")
                         
-                        return  # Don't process as video data
-                except:
-                    pass
-            
-            # Check if this could be a complete video list response (non-fragmented)
-            # Video list characteristics:
-            # 1. Small body size (typically < 1000 bytes, but can be larger with many videos)
-            # 2. Starts with 2-byte video count (big-endian)
-            # 3. Body length should be: 2 + (video_count * entry_size)
-            # 4. Entry size is typically 18 bytes (or 22 bytes with file size)
+                        return  # Don't process as continuation or video data
+            except Exception as e:
+                # Not a count message, continue with normal processing
+                pass
+        
+        # Check if we're already buffering (continuation message)
+        if self.video_list_count is not None:
+            # Reset timeout timer since we're receiving data
+            self.video_list_received_time = time.time()
             
-            is_potential_video_list = False
-            detection_reason = ""
+            print(f"[VIDEO LIST BUFFER] Continuation message received: {len(body)} bytes")
+            print(f"[VIDEO LIST BUFFER] Current buffer: {len(self.video_list_buffer)} bytes (has count), expected: {self.video_list_expected_size} bytes")
             
+            # Check if this continuation message also starts with count (device might repeat it)
+            # If so, skip the count bytes and only append the entries
             if len(body) >= 2:
-                # Check if body starts with a reasonable video count
                 try:
-                    video_count = struct.unpack('>H', body[0:2])[0]
-                    # Reasonable video count: 0 to 1000
-                    if 0 <= video_count <= 1000:
-                        # Check if body size matches expected format
-                        # Minimum: 2 bytes (count) + 0 videos = 2 bytes
-                        # Maximum reasonable: 2 + (1000 * 22) = 22002 bytes
-                        if len(body) >= 2:
-                            # Try 18-byte format first
-                            expected_size_18 = 2 + (video_count * 18)
-                            # Try 22-byte format (with file size)
-                            expected_size_22 = 2 + (video_count * 22)
-                            
-                            # Allow some tolerance (messages might have extra padding or be incomplete)
-                            if (abs(len(body) - expected_size_18) <= 10 or 
-                                abs(len(body) - expected_size_22) <= 10 or
-                                (len(body) < 1000 and video_count == 0)):  # Empty list is small
-                                is_potential_video_list = True
-                                detection_reason = f"Structure matches video list: count={video_count}, body_size={len(body)}, expected_18={expected_size_18}, expected_22={expected_size_22}"
+                    body_count = struct.unpack('>H', body[0:2])[0]
+                    if body_count == self.video_list_count:
+                        # This message also has the count, skip it and append rest
+                        print(f"[VIDEO LIST BUFFER] Continuation message also contains count ({body_count}), skipping count bytes")
+                        self.video_list_buffer.extend(body[2:])  # Skip count, append entries
+                    else:
+                        # No count in this message, append entire body
+                        self.video_list_buffer.extend(body)
                 except:
-                    pass
+                    # Can't parse count, just append entire body
+                    self.video_list_buffer.extend(body)
+            else:
+                # Body too short, append as-is
+                self.video_list_buffer.extend(body)
             
-            # Also check if we sent a query (but don't require it)
-            query_was_sent = hasattr(self, '_video_list_query_sent') and self._video_list_query_sent
+            print(f"[VIDEO LIST BUFFER] Buffer now: {len(self.video_list_buffer)} bytes")
             
-            if is_potential_video_list or (query_was_sent and len(body) < 1000):
-                print(f"[VIDEO LIST] Detected potential video list response from {phone}")
-                print(f"[VIDEO LIST]   Body size: {len(body)} bytes")
-                print(f"[VIDEO LIST]   Query was sent: {query_was_sent}")
-                print(f"[VIDEO LIST]   Detection reason: {detection_reason if is_potential_video_list else 'Query flag set and small body'}")
-                
-                # Try to parse as video list
-                video_list = self.parser.parse_video_list_response(body)
+            # Check if buffer is complete
+            if len(self.video_list_buffer) >= self.video_list_expected_size:
+                print(f"[VIDEO LIST BUFFER] ✓ Buffer complete! Parsing video list...")
+                video_list = self.parser.parse_video_list_response(bytes(self.video_list_buffer))
                 if video_list and 'videos' in video_list:
                     print(f"[VIDEO LIST] ✓ Video list response successfully parsed from {phone}: {video_list['video_count']} videos")
                     self.stored_videos = video_list['videos']
@@ -703,209 +627,302 @@ class DeviceHandler:
                     except Exception as e:
                         print(f"[ERROR] Failed to send video list acknowledgment: {e}")
                     
+                    # Clear buffer and reset query state
+                    self.video_list_buffer = bytearray()
+                    self.video_list_count = None
+                    self.video_list_expected_size = None
+                    self.video_list_received_time = None
+                    self._video_list_query_in_progress = False
+                    self._stop_timeout_checker()
                     return
                 else:
-                    print(f"[VIDEO LIST] Parsing failed - not a valid video list response")
-                    if query_was_sent:
-                        print(f"[VIDEO LIST] Query was sent but response doesn't match video list format")
-            
-            # If not a video list, treat as regular video data
-            if query_was_sent:
-                print(f"[VIDEO LIST] Received 0x1205 but not a video list (body_size={len(body)}), treating as video data")
-            # Fall through to video upload handler
-        
-        # Handle video upload (0x1205) - JTT 1078 (stored video data)
-        # This is actual video data being uploaded from device storage
-        # Note: Video list responses are handled above, so this should only be video data
-        elif msg_id == MSG_ID_VIDEO_UPLOAD:
-            # This should only be reached if the message wasn't identified as a video list above
-            # Log that we're treating this as video data
-            print(f"[STORED VIDEO] Processing 0x1205 as video data (not video list): body_size={len(body)} bytes")
-            
-            # This is stored video data upload
-            print(f"[STORED VIDEO] Video data received from {phone} (0x1205)")
-            video_info = self.parser.parse_video_data(body)
-            if video_info:
-                channel = video_info['logic_channel']
-                video_data = video_info['video_data']
-                
-                # Check if this is part of a stored video download
-                video_key = f"{phone}_{channel}_{video_info.get('time', '')}"
-                
-                if video_key in self.video_download_buffers:
-                    # Append to download buffer
-                    self.video_download_buffers[video_key].append(video_data)
-                    print(f"[STORED VIDEO] Chunk received: Channel={channel}, ChunkSize={len(video_data)} bytes, "
-                          f"TotalChunks={len(self.video_download_buffers[video_key])}")
-                else:
-                    # New video download, initialize buffer
-                    self.video_download_buffers[video_key] = [video_data]
-                    self.video_downloads[video_key] = {
-                        'device_id': phone,
-                        'channel': channel,
-                        'status': 'downloading',
-                        'start_time': time.time()
-                    }
-                    print(f"[STORED VIDEO] New video download started: Channel={channel}, FirstChunk={len(video_data)} bytes")
-                
-                # Stream to browser in real-time via stream manager
-                stream_manager.add_frame(
-                    phone,
-                    channel,
-                    video_data,
-                    {
-                        'latitude': video_info['latitude'],
-                        'longitude': video_info['longitude'],
-                        'speed': video_info['speed'],
-                        'direction': video_info['direction']
-                    }
-                )
-                
-                print(f"[STORED VIDEO] Channel={channel}, Size={len(video_data)} bytes, "
-                      f"GPS=({video_info['latitude']:.6f}, {video_info['longitude']:.6f})")
-        
-        # Handle video upload initialization (0x1206)
-        elif msg_id == MSG_ID_VIDEO_UPLOAD_INIT:
-            print(f"[STORED VIDEO] Video upload initialization received from {phone} (0x1206)")
-            # Device is initiating a stored video upload
-            # Parse initialization message if needed
-            if len(body) >= 4:
-                channel = struct.unpack('>B', body[0:1])[0]
-                video_type = struct.unpack('>B', body[1:2])[0]
-                start_time_bytes = body[2:8] if len(body) >= 8 else body[2:]
-                start_time_str = ''.join([f'{b >> 4}{b & 0x0F}' for b in start_time_bytes[:6]])
+                    print(f"[VIDEO LIST BUFFER] Parsing failed even with complete buffer")
+                    print(f"[VIDEO LIST BUFFER] Buffer content (first 50 bytes): {binascii.hexlify(self.video_list_buffer[:50]).decode()}")
+                    # Reset buffer on parse failure
+                    self.video_list_buffer = bytearray()
+                    self.video_list_count = None
+                    self.video_list_expected_size = None
+                    self.video_list_received_time = None
+                    self._video_list_query_in_progress = False
+                    self._stop_timeout_checker()
+            else:
+                # Still waiting for more data
+                remaining = self.video_list_expected_size - len(self.video_list_buffer)
+                print(f"[VIDEO LIST BUFFER] Still waiting for {remaining} more bytes...")
+                return  # Don't process as video data yet
+        
+        # Check if this is a new count-only message (first fragment)
+        # Device sends 6-byte message: count (2 bytes) + 4 bytes of zeros
+        if len(body) == 6 and len(body) >= 2:
+            try:
+                video_count = struct.unpack('>H', body[0:2])[0]
+                # Check if remaining bytes are zeros (typical pattern)
+                remaining_bytes = body[2:6]
+                if 0 < video_count <= 1000 and remaining_bytes == b'\x00\x00\x00\x00':
+                    print(f"[VIDEO LIST BUFFER] Detected count-only message: {video_count} videos")
+                    print(f"[VIDEO LIST BUFFER] Initializing buffer, expecting video entries in subsequent messages")
+                    
+                    # Initialize buffer with count
+                    self.video_list_count = video_count
+                    self.video_list_buffer = bytearray(body[:2])  # Store just the count
+                    # Calculate expected size (try 18-byte format first)
+                    self.video_list_expected_size = 2 + (video_count * 18)
+                    self.video_list_received_time = time.time()
+                    self._video_list_query_in_progress = True
+                    
+                    # Start background timeout checker
+                    self._start_timeout_checker()
+                    
+                    print(f"[VIDEO LIST BUFFER] Buffer initialized: count={video_count}, expected_size={self.video_list_expected_size} bytes")
+                    print(f"[VIDEO LIST BUFFER] Waiting for {self.video_list_expected_size - 2} more bytes in subsequent messages...")
+                    
+                    # Acknowledge the count message
+                    try:
+                        response = self.parser.build_terminal_response(phone, msg_seq, MSG_ID_VIDEO_LIST_QUERY, 0)
+                        self.conn.send(response)
+                        print(f"[TX] Video list count message acknowledged, waiting for entries...")
+                    except Exception as e:
+                        print(f"[ERROR] Failed to send acknowledgment: {e}")
+                    
+                    return  # Don't process as video data
+            except:
+                pass
+        
+        # Check if this could be a complete video list response (non-fragmented)
+        # Video list characteristics:
+        # 1. Small body size (typically < 1000 bytes, but can be larger with many videos)
+        # 2. Starts with 2-byte video count (big-endian)
+        # 3. Body length should be: 2 + (video_count * entry_size)
+        # 4. Entry size is typically 18 bytes (or 22 bytes with file size)
+        
+        is_potential_video_list = False
+        detection_reason = ""
+        
+        if len(body) >= 2:
+            # Check if body starts with a reasonable video count
+            try:
+                video_count = struct.unpack('>H', body[0:2])[0]
+                # Reasonable video count: 0 to 1000
+                if 0 <= video_count <= 1000:
+                    # Check if body size matches expected format
+                    # Minimum: 2 bytes (count) + 0 videos = 2 bytes
+                    # Maximum reasonable: 2 + (1000 * 22) = 22002 bytes
+                    if len(body) >= 2:
+                        # Try 18-byte format first
+                        expected_size_18 = 2 + (video_count * 18)
+                        # Try 22-byte format (with file size)
+                        expected_size_22 = 2 + (video_count * 22)
+                        
+                        # Allow some tolerance (messages might have extra padding or be incomplete)
+                        if (abs(len(body) - expected_size_18) <= 10 or 
+                            abs(len(body) - expected_size_22) <= 10 or
+                            (len(body) < 1000 and video_count == 0)):  # Empty list is small
+                            is_potential_video_list = True
+                            detection_reason = f"Structure matches video list: count={video_count}, body_size={len(body)}, expected_18={expected_size_18}, expected_22={expected_size_22}"
+            except:
+                pass
+        
+        # Also check if we sent a query (but don't require it)
+        query_was_sent = hasattr(self, '_video_list_query_sent') and self._video_list_query_sent
+        
+        if is_potential_video_list or (query_was_sent and len(body) < 1000):
+            print(f"[VIDEO LIST] Detected potential video list response from {phone}")
+            print(f"[VIDEO LIST]   Body size: {len(body)} bytes")
+            print(f"[VIDEO LIST]   Query was sent: {query_was_sent}")
+            print(f"[VIDEO LIST]   Detection reason: {detection_reason if is_potential_video_list else 'Query flag set and small body'}")
+            
+            # Try to parse as video list
+            video_list = self.parser.parse_video_list_response(body)
+            if video_list and 'videos' in video_list:
+                print(f"[VIDEO LIST] ✓ Video list response successfully parsed from {phone}: {video_list['video_count']} videos")
+                self.stored_videos = video_list['videos']
+                self.video_list_received = True
                 
-                video_key = f"{phone}_{channel}_{start_time_str}"
-                self.video_downloads[video_key] = {
-                    'device_id': phone,
-                    'channel': channel,
-                    'status': 'initializing',
-                    'start_time': time.time(),
-                    'video_type': video_type
-                }
-                self.video_download_buffers[video_key] = []
-                self._video_download_in_progress = True
+                # Log video details
+                for video in self.stored_videos:
+                    print(f"[VIDEO LIST]   Video {video['index']}: Channel={video['channel']}, "
+                          f"Time={video['start_time']} to {video['end_time']}, "
+                          f"Alarm=0x{video['alarm_type']:08X}, Type={video['video_type']}")
                 
-                print(f"[STORED VIDEO] Upload init: Channel={channel}, VideoType={video_type}, StartTime={start_time_str}")
+                # Send response acknowledgment
+                try:
+                    response = self.parser.build_terminal_response(phone, msg_seq, MSG_ID_VIDEO_LIST_QUERY, 0)
+                    self.conn.send(response)
+                    print(f"[TX] Video list response acknowledged")
+                except Exception as e:
+                    print(f"[ERROR] Failed to send video list acknowledgment: {e}")
                 
-                # Send acknowledgment
-                response = self.parser.build_terminal_response(phone, msg_seq, MSG_ID_VIDEO_UPLOAD_INIT, 0)
-                self.conn.send(response)
-                print(f"[TX] Video upload init acknowledged")
-        
-        # Handle real-time video data (0x9201, 0x9202, 0x9206, 0x9207) - JTT 1078
-        # Note: 0x9202 can be either:
-        # - Video control command (when sent TO device to start/stop video) - 4 bytes
-        # - Video data message (when received FROM device with video data) - 13+ bytes
-        # This handler processes 0x9202 as video data when received from device
-        elif msg_id in [MSG_ID_VIDEO_DATA, MSG_ID_VIDEO_DATA_CONTROL, 0x9206, 0x9207]:
-            # Check if 0x9202 is a control command (4 bytes) or video data (13+ bytes)
-            if msg_id == MSG_ID_VIDEO_DATA_CONTROL and len(body) == 4:
-                print(f"[VIDEO] Received 0x9202 control command response (4 bytes) - not video data")
-                # This might be a response to our control command, or device sending control back
-                # Don't treat as video data
+                return
             else:
-                # This is actual video data
-                # Mark that we've received video packets
-                if not self.video_packets_received:
-                    self.video_packets_received = True
-                    if self.video_request_time:
-                        elapsed = time.time() - self.video_request_time
-                        print(f"[VIDEO] ✓✓✓ FIRST VIDEO PACKET RECEIVED after {elapsed:.2f} seconds! ✓✓✓")
-                    if self.video_control_time:
-                        elapsed = time.time() - self.video_control_time
-                        print(f"[VIDEO] First packet received {elapsed:.2f} seconds after control command")
-                
+                print(f"[VIDEO LIST] Parsing failed - not a valid video list response")
+                if query_was_sent:
+                    print(f"[VIDEO LIST] Query was sent but response doesn't match video list format")
+        
+        # If not a video list, treat as regular video data
+        if query_was_sent:
+            print(f"[VIDEO LIST] Received 0x1205 but not a video list (body_size={len(body)}), treating as video data")
+    
+    def _handle_video_upload_init(self, msg_id, phone, msg_seq, body):
+        """Handle video upload initialization (0x1206)"""
+        print(f"[STORED VIDEO] Video upload initialization received from {phone} (0x1206)")
+        # Device is initiating a stored video upload
+        # Parse initialization message if needed
+        if len(body) >= 4:
+            channel = body[0]
+            video_type = body[1]
+            start_time_bytes = body[2:8] if len(body) >= 8 else body[2:]
+            start_time_str = bcd_to_str(start_time_bytes[:6])
+            
+            video_key = f"{phone}_{channel}_{start_time_str}"
+            self.video_downloads[video_key] = {
+                'device_id': phone,
+                'channel': channel,
+                'status': 'initializing',
+                'start_time': time.time(),
+                'video_type': video_type
+            }
+            self.video_download_buffers[video_key] = []
+            self._video_download_in_progress = True
+            
+            print(f"[STORED VIDEO] Upload init: Channel={channel}, VideoType={video_type}, StartTime={start_time_str}")
+            
+            # Send acknowledgment
+            response = self.parser.build_terminal_response(phone, msg_seq, MSG_ID_VIDEO_UPLOAD_INIT, 0)
+            self.conn.send(response)
+            print(f"[TX] Video upload init acknowledged")
+    
+    def _handle_realtime_video_data(self, msg_id, phone, msg_seq, body):
+        """
+        Handle real-time video data (0x9201, 0x9202, 0x9206, 0x9207) - JTT 1078
+        Note: 0x9202 can be either:
+        - Video control command (when sent TO device to start/stop video) - 4 bytes
+        - Video data message (when received FROM device with video data) - 13+ bytes
+        This handler processes 0x9202 as video data when received from device
+        """
+        # Check if 0x9202 is a control command (4 bytes) or video data (13+ bytes)
+        if msg_id == MSG_ID_VIDEO_DATA_CONTROL and len(body) == 4:
+            print(f"[VIDEO] Received 0x9202 control command response (4 bytes) - not video data")
+            # This might be a response to our control command, or device sending control back
+            # Don't treat as video data
+        else:
+            # This is actual video data
+            # Mark that we've received video packets
+            if not self.video_packets_received:
+                self.video_packets_received = True
+                if self.video_request_time:
+                    elapsed = time.time() - self.video_request_time
+                    print(f"[VIDEO] ✓✓✓ FIRST VIDEO PACKET RECEIVED after {elapsed:.2f} seconds! ✓✓✓")
+                if self.video_control_time:
+                    elapsed = time.time() - self.video_control_time
+                    print(f"[VIDEO] First packet received {elapsed:.2f} seconds after control command")
+            
+            if TRACE_MESSAGES:
                 print(f"[VIDEO] ✓✓✓ Real-time video data received from {phone} (0x{msg_id:04X}) ✓✓✓")
                 print(f"[VIDEO] Body length: {len(body)} bytes")
+            
+            # Show first few bytes for debugging
+            if HEX_DUMP and len(body) > 0:
+                hex_preview = binascii.hexlify(body[:min(20, len(body))]).decode()
+                formatted_hex = ' '.join([hex_preview[i:i+2] for i in range(0, len(hex_preview), 2)])
+                print(f"[VIDEO] First bytes: {formatted_hex}")
+            
+            video_info = self.parse_realtime_video_data(body, msg_id)
+            if video_info:
+                channel = video_info['logic_channel']
+                package_type = video_info.get('package_type', 1)
+                video_data = bytes(video_info['video_data'])  # may wait in the frame buffer, so copy out of the message body
+                timestamp = video_info.get('timestamp', '')
+                data_type = video_info.get('data_type', 'N/A')
                 
-                # Show first few bytes for debugging
-                if len(body) > 0:
-                    hex_preview = binascii.hexlify(body[:min(20, len(body))]).decode()
-                    formatted_hex = ' '.join([hex_preview[i:i+2] for i in range(0, len(hex_preview), 2)])
-                    print(f"[VIDEO] First bytes: {formatted_hex}")
-                
-                video_info = self.parse_realtime_video_data(body, msg_id)
-                if video_info:
-                    channel = video_info['logic_channel']
-                    package_type = video_info.get('package_type', 1)
-                    video_data = video_info['video_data']
-                    timestamp = video_info.get('timestamp', '')
-                    data_type = video_info.get('data_type', 'N/A')
-                    
-                    data_type_names = {0: 'I-frame', 1: 'P-frame', 2: 'B-frame', 3: 'Audio'}
-                    data_type_str = data_type_names.get(data_type, f'Unknown({data_type})')
-                    
+                if TRACE_MESSAGES:
+                    data_type_str = VIDEO_DATA_TYPE_NAMES.get(data_type, f'Unknown({data_type})')
                     print(f"[VIDEO] Parsed: Channel={channel}, DataType={data_type_str}, "
                           f"PackageType={package_type}, VideoSize={len(video_data)} bytes, Timestamp={timestamp}")
-                    
-                    # Use timestamp as frame ID for reassembly
-                    frame_id = timestamp if timestamp else f"{msg_seq}_{channel}"
-                    frame_key = (channel, frame_id)
-                    
-                    # Handle frame reassembly for multi-packet frames
-                    if package_type == 0:  # Frame start
-                        self.video_frame_buffers[frame_key] = [video_data]
+                
+                # Use timestamp as frame ID for reassembly
+                frame_id = timestamp if timestamp else f"{msg_seq}_{channel}"
+                frame_key = (channel, frame_id)
+                
+                # Handle frame reassembly for multi-packet frames
+                if package_type == 0:  # Frame start
+                    self.video_frame_buffers[frame_key] = [video_data]
+                    if TRACE_MESSAGES:
                         print(f"[VIDEO] Frame START - Channel={channel}, FrameID={frame_id}, Size={len(video_data)} bytes")
-                    elif package_type == 1:  # Frame continuation
-                        if frame_key in self.video_frame_buffers:
-                            self.video_frame_buffers[frame_key].append(video_data)
+                elif package_type == 1:  # Frame continuation
+                    if frame_key in self.video_frame_buffers:
+                        self.video_frame_buffers[frame_key].append(video_data)
+                        if TRACE_MESSAGES:
                             print(f"[VIDEO] Frame CONTINUE - Channel={channel}, FrameID={frame_id}, PacketSize={len(video_data)} bytes")
-                        else:
-                            # Start new frame if we missed the start packet
-                            self.video_frame_buffers[frame_key] = [video_data]
-                            print(f"[VIDEO] Frame CONTINUE (missed start) - Channel={channel}, FrameID={frame_id}")
-                    elif package_type == 2:  # Frame end
-                        if frame_key in self.video_frame_buffers:
-                            self.video_frame_buffers[frame_key].append(video_data)
-                            # Reassemble complete frame
-                            complete_frame = b''.join(self.video_frame_buffers[frame_key])
-                            del self.video_frame_buffers[frame_key]
+                    else:
+                        # Start new frame if we missed the start packet
+                        self.video_frame_buffers[frame_key] = [video_data]
+                        print(f"[VIDEO] Frame CONTINUE (missed start) - Channel={channel}, FrameID={frame_id}")
+                elif package_type == 2:  # Frame end
+                    if frame_key in self.video_frame_buffers:
+                        self.video_frame_buffers[frame_key].append(video_data)
+                        # Reassemble complete frame
+                        complete_frame = b''.join(self.video_frame_buffers[frame_key])
+                        del self.video_frame_buffers[frame_key]
+                        if TRACE_MESSAGES:
                             print(f"[VIDEO] Frame END - Channel={channel}, FrameID={frame_id}, TotalSize={len(complete_frame)} bytes")
-                            video_data = complete_frame
-                        else:
-                            # Frame end without start/continuation, use as single packet
-                            print(f"[VIDEO] Frame END (single packet) - Channel={channel}, Size={len(video_data)} bytes")
+                        video_data = complete_frame
+                    else:
+                        # Frame end without start/continuation, use as single packet
+                        print(f"[VIDEO] Frame END (single packet) - Channel={channel}, Size={len(video_data)} bytes")
+                
+                # Only add to stream manager if we have complete frame or single packet
+                if package_type == 2 or (package_type == 0 and len(video_data) > 0):
+                    # Add frame to stream manager
+                    stream_manager.add_frame(
+                        phone,
+                        channel,
+                        video_data,
+                        {
+                            'latitude': video_info.get('latitude', 0.0),
+                            'longitude': video_info.get('longitude', 0.0),
+                            'speed': video_info.get('speed', 0.0),
+                            'direction': video_info.get('direction', 0)
+                        }
+                    )
                     
-                    # Only add to stream manager if we have complete frame or single packet
-                    if package_type == 2 or (package_type == 0 and len(video_data) > 0):
-                        # Add frame to stream manager
-                        stream_manager.add_frame(
-                            phone,
-                            channel,
-                            video_data,
-                            {
-                                'latitude': video_info.get('latitude', 0.0),
-                                'longitude': video_info.get('longitude', 0.0),
-                                'speed': video_info.get('speed', 0.0),
-                                'direction': video_info.get('direction', 0)
-                            }
-                        )
-                        
+                    if TRACE_MESSAGES:
                         print(f"[VIDEO] ✓✓✓ Frame added to stream - Device={phone}, Channel={channel}, "
                               f"DataType={data_type_str}, Size={len(video_data)} bytes ✓✓✓")
-                else:
-                    print(f"[VIDEO] ✗ Failed to parse video data from {phone}")
-                    print(f"[VIDEO] Body length: {len(body)} bytes")
-                    if len(body) > 0:
-                        hex_preview = binascii.hexlify(body[:min(50, len(body))]).decode()
-                        formatted_hex = ' '.join([hex_preview[i:i+2] for i in range(0, len(hex_preview), 2)])
-                        print(f"[VIDEO] Body hex (first 50 bytes): {formatted_hex}")
+            else:
+                print(f"[VIDEO] ✗ Failed to parse video data from {phone}")
+                print(f"[VIDEO] Body length: {len(body)} bytes")
+                if len(body) > 0:
+                    hex_preview = binascii.hexlify(body[:min(50, len(body))]).decode()
+                    formatted_hex = ' '.join([hex_preview[i:i+2] for i in range(0, len(hex_preview), 2)])
+                    print(f"[VIDEO] Body hex (first 50 bytes): {formatted_hex}")
+    
+    def _handle_unknown_message(self, msg_id, phone, msg_seq, body):
+        """Handle unrecognized message IDs"""
+        print(f"[?] Unknown message ID: 0x{msg_id:04X} from {phone}")
+        print(f"[?] Message body length: {len(body)} bytes")
+        if len(body) > 0:
+            print(f"[?] Body hex (first 50 bytes): {binascii.hexlify(body[:50]).decode()}")
+        # Check if this might be a video packet with wrong message ID parsing
+        if len(body) >= 15:
+            # Check if it looks like video data structure
+            potential_channel = body[0]
+            potential_data_type = body[1]
+            if potential_data_type in [0, 1, 2, 3]:  # Valid data types
+                print(f"[?] WARNING: This might be a video packet! Channel={potential_channel}, DataType={potential_data_type}")
+    
+    def send_messages(self, *messages):
+        """
+        Send several built messages back-to-back in a single write
         
-        else:
-            print(f"[?] Unknown message ID: 0x{msg_id:04X} from {phone}")
-            print(f"[?] Message body length: {len(body)} bytes")
-            if len(body) > 0:
-                print(f"[?] Body hex (first 50 bytes): {binascii.hexlify(body[:50]).decode()}")
-            # Check if this might be a video packet with wrong message ID parsing
-            if len(body) >= 15:
-                # Check if it looks like video data structure
-                potential_channel = body[0]
-                potential_data_type = body[1]
-                if potential_data_type in [0, 1, 2, 3]:  # Valid data types
-                    print(f"[?] WARNING: This might be a video packet! Channel={potential_channel}, DataType={potential_data_type}")
+        Joining the frames before sendall() lets them leave in one TCP segment
+        instead of one small segment (and syscall) per message.
+        
+        Args:
+            messages: Complete, escaped JT808 frames
+        """
+        self.conn.sendall(b''.join(messages))
     
-    def send_video_control_command(self, phone, msg_seq, channel, control_type=1, data_type=0xFF, stream_type=0xFF):
+    def send_video_control_command(self, phone, msg_seq, channel, control_type=1, data_type=0xFF, stream_type=0xFF, followed_by=None):
         """
         Send video control command (0x9202) to start/stop video streaming
         
@@ -938,11 +955,14 @@ class DeviceHandler:
             control_type: Control type (1=Switch code stream to start video)
             data_type: Data type (0xFF=all types)
             stream_type: Stream type (0xFF=all streams)
+            followed_by: Optional message to send in the same write (e.g. keep-alive heartbeat)
+        
+        Returns: True if the command (and followed_by) was sent, False otherwise
         """
         try:
             if not self.conn:
                 print(f"[ERROR] Cannot send video control command: no connection")
-                return
+                return False
             
             control_command = self.parser.build_video_control_command(
                 phone=phone,
@@ -953,7 +973,10 @@ class DeviceHandler:
                 stream_type=stream_type
             )
             
-            self.conn.send(control_command)
+            if followed_by:
+                self.send_messages(control_command, followed_by)
+            else:
+                self.conn.send(control_command)
             self.video_control_sent = True
             self.video_control_time = time.time()
             
@@ -962,10 +985,12 @@ class DeviceHandler:
             print(f"[TX] Video control command (0x9202) sent to {phone}: Channel={channel}, ControlType={control_type}")
             print(f"[TX HEX] Complete message: {formatted_hex}")
             print(f"[TX STRUCT] Message structure: [7E][ID=9202(2)][Attr(2)][Phone={phone}(6)][Seq(2)][Body(4)][Checksum(1)][7E]")
+            return True
         except Exception as e:
             print(f"[ERROR] Failed to send video control command: {e}")
             import traceback
             traceback.print_exc()
+            return False
     
     def query_video_list(self, phone, msg_seq):
         """
@@ -1212,10 +1237,13 @@ class DeviceHandler:
     
     def try_video_request_after_location(self, phone, msg_seq):
         """Try sending video request after location data (delayed)"""
-        time.sleep(1)  # Wait 1 second after location data
-        if not self.video_request_sent:
-            print(f"[INFO] Attempting video request after location data...")
-            self.try_video_request(phone, msg_seq)
+        try:
+            time.sleep(1)  # Wait 1 second after location data
+            if not self.video_request_sent:
+                print(f"[INFO] Attempting video request after location data...")
+                self.try_video_request(phone, msg_seq)
+        finally:
+            self._location_video_request_pending = False
     
     def try_video_request(self, phone, msg_seq, try_video_list_first=False):
         """Try sending video request with different configurations"""
@@ -1233,10 +1261,10 @@ class DeviceHandler:
             server_ip = self.conn.getsockname()[0] if self.conn else '0.0.0.0'
             # If bound to 0.0.0.0, try to get the actual IP the device can reach
             if server_ip == '0.0.0.0':
-                server_ip = os.environ.get('VIDEO_SERVER_IP', '82.180.145.220')
+                server_ip = VIDEO_SERVER_IP
             
             # Use same port as JT808 for video (or separate port if configured)
-            video_port = int(os.environ.get('VIDEO_PORT', JT808_PORT))
+            video_port = VIDEO_PORT
             
             # Try multiple configurations
             configs_to_try = [
@@ -1337,20 +1365,11 @@ class DeviceHandler:
             b'\x00\x00\x01',      # 3-byte start code
         ]
         
+        # Substring search runs in C; a start code anywhere is a match
         for pattern in h264_patterns:
             if pattern in data:
                 return True
         
-        # Also check for common H.264 NAL unit types after start codes
-        for i in range(len(data) - 5):
-            if data[i:i+3] == b'\x00\x00\x01' or data[i:i+4] == b'\x00\x00\x00\x01':
-                # Check NAL unit type (first byte after start code)
-                if i + len(pattern) < len(data):
-                    nal_type = data[i + len(pattern)] & 0x1F
-                    # Valid NAL unit types: 1-5 (non-IDR/IDR slices), 6 (SEI), 7 (SPS), 8 (PPS)
-                    if 1 <= nal_type <= 8:
-                        return True
-        
         return False
     
     def detect_rtp_header(self, data):
@@ -1398,18 +1417,22 @@ class DeviceHandler:
         if not self.device_id:
             return
         
-        # Find H.264 start codes
+        # Find H.264 start codes (jump between 00 00 01 matches with find()
+        # instead of comparing slices at every byte offset)
         start_codes = []
         i = 0
-        while i < len(data) - 3:
-            if data[i:i+4] == b'\x00\x00\x00\x01':
-                start_codes.append((i, 4))
-                i += 4
-            elif data[i:i+3] == b'\x00\x00\x01':
-                start_codes.append((i, 3))
-                i += 3
+        while True:
+            j = data.find(b'\x00\x00\x01', i)
+            if j == -1:
+                break
+            if j > i and data[j - 1] == 0:
+                # 4-byte start code 00 00 00 01
+                start_codes.append((j - 1, 4))
+            elif j < len(data) - 3:
+                start_codes.append((j, 3))
             else:
-                i += 1
+                break
+            i = j + 3
         
         if len(start_codes) > 0:
             print(f"[RAW VIDEO] Found {len(start_codes)} H.264 NAL units in raw data")
@@ -1518,7 +1541,6 @@ class DeviceHandler:
         - Bytes 11-12: Last frame size (2 bytes, big-endian)
         - Bytes 13+: Video data (variable length)
         """
-        import struct
         try:
             # Validate message format first
             is_valid, errors = self.validate_video_data_format(body, msg_id)
@@ -1540,7 +1562,7 @@ class DeviceHandler:
             # Parse timestamp (BCD format, 6 bytes: YYMMDDHHmmss) - JTT1078 standard
             timestamp_bytes = body[3:9]  # Changed from 8 bytes to 6 bytes
             if len(timestamp_bytes) == 6:
-                timestamp_str = ''.join([f'{b >> 4}{b & 0x0F}' for b in timestamp_bytes])
+                timestamp_str = bcd_to_str(timestamp_bytes)
             else:
                 timestamp_str = ''
                 print(f"[PROTOCOL] Warning: Timestamp bytes incomplete: {len(timestamp_bytes)} bytes")
@@ -1552,7 +1574,7 @@ class DeviceHandler:
             last_frame_size = struct.unpack('>H', body[11:13])[0] if len(body) >= 13 else 0
             
             # Video data starts at byte 13 (changed from byte 15)
-            video_data = body[13:] if len(body) > 13 else b''
+            video_data = memoryview(body)[13:] if len(body) > 13 else b''  # zero-copy view
             
             return {
                 'logic_channel': logic_channel,
@@ -1588,15 +1610,34 @@ class DeviceHandler:
                     if existing_conn.device_id:
                         print(f"[CONN] Existing connection has device_id: {existing_conn.device_id}")
         
+        # Reusable receive buffer (recv_into avoids a new bytes object per read)
+        recv_buffer = bytearray(RECV_BUFFER_SIZE)
+        recv_view = memoryview(recv_buffer)
+        
+        # Bind hot-path methods once instead of resolving them per read/frame
+        recv_into = self.conn.recv_into
+        buffer = self.buffer
+        find_flag = buffer.find
+        parse_frame = self.parser.parse_frame
+        handle_message = self.handle_message
+        
         while True:
             try:
-                data = self.conn.recv(4096)
-                if not data:
+                nbytes = recv_into(recv_buffer)
+                if not nbytes:
                     print(f"[-] Device {self.device_id} disconnected")
                     break
                 
+                data = recv_view[:nbytes]
+                
                 # Add to buffer
-                self.buffer.extend(data)
+                buffer.extend(data)
+                
+                # Consumed bytes are dropped after every recv, so anything this
+                # large is a frame that never ends (broken or hostile peer)
+                if len(buffer) > MAX_BUFFER_BYTES:
+                    print(f"[ERROR] Receive buffer for {self.addr} exceeded {MAX_BUFFER_BYTES} bytes without a complete frame, disconnecting")
+                    break
                 
                 # Also capture raw data for analysis
                 self.raw_data_buffer.extend(data)
@@ -1618,42 +1659,28 @@ class DeviceHandler:
                             self.raw_data_buffer = self.raw_data_buffer[-2000:]
                 
                 # Try to parse complete messages
+                # Consumed bytes are tracked with an offset and dropped once per
+                # recv, instead of re-slicing the buffer after every frame
+                offset = 0
                 while True:
-                    # Find start flag
-                    start_idx = -1
-                    for i in range(len(self.buffer)):
-                        if self.buffer[i] == 0x7E:
-                            start_idx = i
-                            break
+                    # Find start flag (bytearray.find scans in C)
+                    start_idx = find_flag(0x7E, offset)
                     
                     if start_idx == -1:
-                        # No start flag found, clear buffer
-                        self.buffer.clear()
+                        # No start flag found, discard everything scanned
+                        offset = len(buffer)
                         break
                     
-                    # Remove data before start flag
-                    if start_idx > 0:
-                        self.buffer = self.buffer[start_idx:]
-                    
-                    # Find end flag
-                    end_idx = -1
-                    for i in range(1, len(self.buffer)):
-                        if self.buffer[i] == 0x7E:
-                            end_idx = i
-                            break
+                    # Extract and parse the message in one step
+                    message, msg, offset = parse_frame(buffer, start_idx)
                     
-                    if end_idx == -1:
+                    if message is None:
                         # Incomplete message, wait for more data
                         break
                     
-                    # Extract complete message
-                    message = bytes(self.buffer[:end_idx + 1])
-                    self.buffer = self.buffer[end_idx + 1:]
-                    
-                    # Parse and handle message
-                    msg = self.parser.parse_message(message)
+                    # Handle message
                     if msg:
-                        self.handle_message(msg, raw_message=message)
+                        handle_message(msg, raw_message=message)
                     else:
                         hex_data = binascii.hexlify(message).decode()
                         formatted_hex = ' '.join([hex_data[i:i+2] for i in range(0, len(hex_data), 2)])
@@ -1699,6 +1726,10 @@ class DeviceHandler:
                                 print(f"[PARSE ERROR] ⚠️ Message appears to be RTP packet!")
                                 self.process_rtp_packet(message)
                 
+                # Drop all consumed bytes in one move
+                if offset:
+                    del buffer[:offset]
+            
             except Exception as e:
                 print(f"[ERROR] {e}")
                 import traceback
@@ -1730,6 +1761,48 @@ class DeviceHandler:
         
         print(f"[-] Connection closed for {self.addr}")
 
+# Message dispatch table indexed directly by the 16-bit message ID
+# (None = unknown message, handled by DeviceHandler._handle_unknown_message)
+_MESSAGE_HANDLERS = [None] * 0x10000
+for _msg_id, _handler in (
+    (MSG_ID_TERMINAL_RESPONSE, DeviceHandler._handle_terminal_response),
+    (MSG_ID_TERMINAL_LOGOUT, DeviceHandler._handle_terminal_logout),
+    (MSG_ID_REGISTER, DeviceHandler._handle_register),
+    (MSG_ID_HEARTBEAT, DeviceHandler._handle_heartbeat),
+    (MSG_ID_TERMINAL_AUTH, DeviceHandler._handle_terminal_auth),
+    (MSG_ID_LOCATION_UPLOAD, DeviceHandler._handle_location_upload),
+    (MSG_ID_VIDEO_UPLOAD, DeviceHandler._handle_video_upload),
+    (MSG_ID_VIDEO_UPLOAD_INIT, DeviceHandler._handle_video_upload_init),
+    (MSG_ID_VIDEO_DATA, DeviceHandler._handle_realtime_video_data),
+    (MSG_ID_VIDEO_DATA_CONTROL, DeviceHandler._handle_realtime_video_data),
+    (0x9206, DeviceHandler._handle_realtime_video_data),
+    (0x9207, DeviceHandler._handle_realtime_video_data),
+):
+    _MESSAGE_HANDLERS[_msg_id] = _handler
+del _msg_id, _handler
+
+class UDPVideoHandler:
+    """
+    Minimal per-datagram stand-in for DeviceHandler on the UDP path
+    
+    Datagrams are self-delimited, so the UDP path only needs the stateless
+    detection/parsing helpers plus the sender's device_id; borrowing those
+    from DeviceHandler avoids building a full handler (buffers, dicts and
+    connection state) for every packet.
+    """
+    __slots__ = ('device_id',)
+    parser = jt808_parser
+    
+    detect_h264_patterns = DeviceHandler.detect_h264_patterns
+    detect_rtp_header = DeviceHandler.detect_rtp_header
+    process_raw_h264_data = DeviceHandler.process_raw_h264_data
+    process_rtp_packet = DeviceHandler.process_rtp_packet
+    validate_video_data_format = DeviceHandler.validate_video_data_format
+    parse_realtime_video_data = DeviceHandler.parse_realtime_video_data
+    
+    def __init__(self, device_id=None):
+        self.device_id = device_id
+
 def handle_udp_video_packet(data, addr, port=None):
     """Handle UDP video packets with enhanced analysis"""
     try:
@@ -1739,13 +1812,13 @@ def handle_udp_video_packet(data, addr, port=None):
         print(f"[UDP] Received {packet_size} bytes from {addr} on port {port or 'default'}")
         
         # Try to find associated device ID from IP address
+        # Read without connection_lock: tuple() snapshots the list atomically,
+        # so the per-datagram lookup does not contend with TCP handler threads
         device_id = None
-        with connection_lock:
-            if device_ip in ip_connections:
-                for conn in ip_connections[device_ip]:
-                    if conn.device_id:
-                        device_id = conn.device_id
-                        break
+        for conn in tuple(ip_connections.get(device_ip, ())):
+            if conn.device_id:
+                device_id = conn.device_id
+                break
         
         if device_id:
             print(f"[UDP] Associated with device: {device_id}")
@@ -1757,51 +1830,49 @@ def handle_udp_video_packet(data, addr, port=None):
             print(f"[UDP] Medium packet ({packet_size} bytes) - possibly video data")
         
         # Show hex dump for small packets or first bytes of large packets
-        if packet_size <= 100:
-            hex_dump = binascii.hexlify(data).decode()
-            formatted_hex = ' '.join([hex_dump[i:i+2] for i in range(0, len(hex_dump), 2)])
-            print(f"[UDP HEX] {formatted_hex}")
-        else:
-            hex_dump = binascii.hexlify(data[:100]).decode()
-            formatted_hex = ' '.join([hex_dump[i:i+2] for i in range(0, len(hex_dump), 2)])
-            print(f"[UDP HEX] First 100 bytes: {formatted_hex}...")
+        if HEX_DUMP:
+            if packet_size <= 100:
+                hex_dump = binascii.hexlify(data).decode()
+                formatted_hex = ' '.join([hex_dump[i:i+2] for i in range(0, len(hex_dump), 2)])
+                print(f"[UDP HEX] {formatted_hex}")
+            else:
+                hex_dump = binascii.hexlify(data[:100]).decode()
+                formatted_hex = ' '.join([hex_dump[i:i+2] for i in range(0, len(hex_dump), 2)])
+                print(f"[UDP HEX] First 100 bytes: {formatted_hex}...")
         
         # Check for raw H.264 patterns first (most common for video)
-        handler = DeviceHandler(None, addr)
+        # Lightweight per-datagram handler: only device_id, no per-connection
+        # state to allocate or leak between senders
+        handler = UDPVideoHandler(device_id)
         if handler.detect_h264_patterns(data):
             print(f"[UDP] ✓✓✓ H.264 pattern detected in UDP packet! ✓✓✓")
-            if device_id:
-                # Try to process with device ID
-                handler.device_id = device_id
             handler.process_raw_h264_data(data)
             return
         
         # Check for RTP header
         if handler.detect_rtp_header(data):
             print(f"[UDP] ✓✓✓ RTP header detected in UDP packet! ✓✓✓")
-            if device_id:
-                handler.device_id = device_id
             handler.process_rtp_packet(data)
             return
         
-        # Try to parse as JTT808 message
-        parser = JT808Parser()
-        msg = parser.parse_message(data)
+        # Try to parse as JTT808 message (datagrams are self-delimited, so the
+        # shared parser needs no per-sender state)
+        msg = handler.parser.parse_message(data)
         if msg:
-            msg_id = msg['msg_id']
-            phone = msg.get('phone', device_id or 'Unknown')
+            msg_id = msg.msg_id
+            phone = msg.phone
             
             print(f"[UDP] Parsed message ID=0x{msg_id:04X} from {phone} at {addr}")
             
             # Handle real-time video data on UDP
             if msg_id in [MSG_ID_VIDEO_DATA, MSG_ID_VIDEO_DATA_CONTROL, 0x9206, 0x9207]:
                 # Check if this is a control command (4 bytes) or video data (13+ bytes)
-                if msg_id == MSG_ID_VIDEO_DATA_CONTROL and len(msg['body']) == 4:
+                if msg_id == MSG_ID_VIDEO_DATA_CONTROL and len(msg.body) == 4:
                     print(f"[UDP] Received 0x9202 control command (not video data)")
                 else:
                     print(f"[UDP VIDEO] ✓✓✓ Real-time video data from {phone} at {addr} (0x{msg_id:04X}) ✓✓✓")
                     
-                    video_info = handler.parse_realtime_video_data(msg['body'], msg_id)
+                    video_info = handler.parse_realtime_video_data(msg.body, msg_id)
                     
                     if video_info:
                         channel = video_info['logic_channel']
@@ -1826,9 +1897,9 @@ def handle_udp_video_packet(data, addr, port=None):
                         print(f"[UDP VIDEO] ✓ Frame added to stream - Device={phone}, Channel={channel}, Size={len(video_data)} bytes")
                     else:
                         print(f"[UDP VIDEO] ✗ Failed to parse video data")
-                        print(f"[UDP VIDEO] Body length: {len(msg['body'])} bytes")
-                        if len(msg['body']) > 0:
-                            print(f"[UDP VIDEO] First 20 bytes: {binascii.hexlify(msg['body'][:20]).decode()}")
+                        print(f"[UDP VIDEO] Body length: {len(msg.body)} bytes")
+                        if len(msg.body) > 0:
+                            print(f"[UDP VIDEO] First 20 bytes: {binascii.hexlify(msg.body[:20]).decode()}")
             else:
                 print(f"[UDP] Message ID=0x{msg_id:04X} from {addr} (not video data)")
         else:
@@ -1839,16 +1910,12 @@ def handle_udp_video_packet(data, addr, port=None):
             # Try to process as raw video anyway if packet is large enough
             if packet_size > 100:  # Large packets are likely video
                 print(f"[UDP] Attempting to process as raw video data...")
-                if device_id:
-                    handler.device_id = device_id
                 handler.process_raw_h264_data(data)
             elif packet_size > 20:
                 # Even smaller packets might be video fragments
                 print(f"[UDP] Small packet - checking for video patterns...")
                 if handler.detect_h264_patterns(data):
                     print(f"[UDP] ✓ H.264 pattern found in small packet!")
-                    if device_id:
-                        handler.device_id = device_id
                     handler.process_raw_h264_data(data)
     except Exception as e:
         print(f"[ERROR] Error handling UDP packet from {addr}: {e}")
@@ -1875,9 +1942,17 @@ def start_udp_server(port=None):
         else:
             raise
     
+    # Reusable datagram buffer: recvfrom() would allocate a max-size bytes
+    # object per packet and shrink it; here only the received bytes are copied
+    recv_buffer = bytearray(UDP_RECV_BUFFER_SIZE)
+    recv_view = memoryview(recv_buffer)
+    recvfrom_into = udp_socket.recvfrom_into
+    
     while True:
         try:
-            data, addr = udp_socket.recvfrom(65507)  # Max UDP packet size
+            nbytes, addr = recvfrom_into(recv_buffer)
+            # Handlers may keep slices of the packet, so hand them their own copy
+            data = bytes(recv_view[:nbytes])
             handle_udp_video_packet(data, addr, port)
         except Exception as e:
             print(f"[ERROR] UDP server error on port {port}: {e}")
@@ -1889,7 +1964,7 @@ def start_udp_servers():
     ports_to_try = [
         JT808_PORT,
         JT808_PORT + 1,  # Try next port
-        int(os.environ.get('VIDEO_UDP_PORT', JT808_PORT + 10)),  # Custom video UDP port
+        VIDEO_UDP_PORT,  # Custom video UDP port
     ]
     
     # Remove duplicates
@@ -1906,6 +1981,9 @@ def start_jt808_server():
     """Start JTT 808/1078 server"""
     server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    # Larger kernel receive buffer (inherited by accepted sockets) so video
+    # bursts are drained in fewer, fuller recv_into() calls
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1024 * 1024)  # 1MB buffer
     
     try:
         server.bind((HOST, JT808_PORT))
@@ -1929,6 +2007,8 @@ def start_jt808_server():
     
     while True:
         conn, addr = server.accept()
+        # Small control/response frames: don't let Nagle hold them back
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
         device_ip = addr[0]
         print(f"[CONN] New TCP connection from {addr}")
         
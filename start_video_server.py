@@ -9,7 +9,7 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Import web server components
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import json
 import urllib.parse
 from pathlib import Path
@@ -265,7 +265,8 @@ class VideoFileHandler(BaseHTTPRequestHandler):
 def start_server():
     """Start the video file server"""
     try:
-        server = HTTPServer(('0.0.0.0', WEB_PORT), VideoFileHandler)
+        # One thread per request: a long-lived stream must not block the API
+        server = ThreadingHTTPServer(('0.0.0.0', WEB_PORT), VideoFileHandler)
         print(f"[*] Video File Server listening on http://0.0.0.0:{WEB_PORT}")
         print(f"[*] Access the video player at: http://localhost:{WEB_PORT}")
         print(f"[*] Press Ctrl+C to stop the server")
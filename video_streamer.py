@@ -3,14 +3,15 @@ Video Stream Manager
 Manages video streams from multiple devices and provides streaming to web clients
 """
 import threading
-import queue
 import time
-from collections import defaultdict
+from collections import defaultdict, deque
 
 class VideoStreamManager:
     def __init__(self):
         self.streams = defaultdict(lambda: {
-            'frames': queue.Queue(maxsize=30),
+            'frames': deque(maxlen=30),  # bounded: oldest frame drops when full
+            'next_seq': 0,  # sequence number of the next frame added
+            'poll_seq': -1,  # last frame handed out by get_frame
             'last_update': time.time(),
             'device_info': {}
         })
@@ -22,40 +23,83 @@ class VideoStreamManager:
         
         with self.lock:
             stream = self.streams[stream_key]
-            stream['last_update'] = time.time()
+            now = time.time()
+            stream['last_update'] = now
             if metadata:
                 stream['device_info'].update(metadata)
             
-            # Add frame to queue (drop old frames if queue is full)
-            try:
-                stream['frames'].put_nowait((frame_data, time.time()))
-            except queue.Full:
-                # Remove oldest frame
-                try:
-                    stream['frames'].get_nowait()
-                    stream['frames'].put_nowait((frame_data, time.time()))
-                except queue.Empty:
-                    pass
+            # Add frame to queue (deque maxlen drops the oldest frame when full);
+            # store bytes, never a view that would pin the whole message body
+            stream['frames'].append((stream['next_seq'], bytes(frame_data), now))
+            stream['next_seq'] += 1
+    
+    def _active_stream(self, stream_key):
+        """Stream with buffered frames updated within 30 seconds, else None (call with lock held)"""
+        if stream_key not in self.streams:
+            return None
+        
+        stream = self.streams[stream_key]
+        
+        # Check if stream is still active (within 30 seconds)
+        if time.time() - stream['last_update'] > 30:
+            return None
+        
+        if not stream['frames']:
+            return None
+        return stream
+    
+    def _frame_after(self, stream, last_seq):
+        """Oldest buffered frame newer than last_seq, or the newest frame if last_seq is None"""
+        frames = stream['frames']
+        if last_seq is None:
+            seq, frame_data, timestamp = frames[-1]
+            return frame_data, seq
+        
+        # Sequence numbers in the deque are contiguous; a cursor behind the
+        # oldest frame skips what was dropped, and a cursor ahead of the
+        # stream (stream was cleaned up and restarted) starts over
+        index = last_seq + 1 - frames[0][0]
+        if index < 0 or last_seq >= stream['next_seq']:
+            index = 0
+        if index >= len(frames):
+            return None, last_seq
+        seq, frame_data, timestamp = frames[index]
+        return frame_data, seq
     
     def get_frame(self, device_id, channel):
-        """Get latest frame for a stream"""
+        """
+        Get next frame for a stream (/api/stream polling)
+        
+        Each frame is handed out once across pollers, as before, but through
+        the stream's own poll cursor rather than by removing it, so MJPEG
+        viewers still see every frame.
+        """
         stream_key = f"{device_id}_{channel}"
         
         with self.lock:
-            if stream_key not in self.streams:
-                return None
-            
-            stream = self.streams[stream_key]
-            
-            # Check if stream is still active (within 30 seconds)
-            if time.time() - stream['last_update'] > 30:
-                return None
-            
-            try:
-                frame_data, timestamp = stream['frames'].get_nowait()
-                return frame_data
-            except queue.Empty:
+            stream = self._active_stream(stream_key)
+            if stream is None:
                 return None
+            frame_data, stream['poll_seq'] = self._frame_after(stream, stream['poll_seq'])
+            return frame_data
+    
+    def get_frame_after(self, device_id, channel, last_seq=None):
+        """
+        Get the oldest frame newer than a viewer's read cursor
+        
+        Each viewer keeps its own last_seq, so concurrent viewers of one
+        stream all see every frame. A new viewer passes None and starts at
+        the newest frame instead of replaying the buffered backlog.
+        
+        Returns: (frame_data, seq), or (None, last_seq) if nothing new
+        """
+        stream_key = f"{device_id}_{channel}"
+        
+        with self.lock:
+            stream = self._active_stream(stream_key)
+            if stream is None:
+                return None, last_seq
+            return self._frame_after(stream, last_seq)
     
     def get_active_streams(self):
         """Get list of active streams"""
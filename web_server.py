@@ -2,7 +2,7 @@
 Web Server for Video Streaming Interface
 Serves HTML interface and provides video streaming via HTTP
 """
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import json
 import threading
 import sys
@@ -657,9 +657,11 @@ class StreamingHandler(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Origin', '*')
         self.end_headers()
         
-        # Stream frames
+        # Stream frames; this client's own cursor, so other viewers of the
+        # same stream do not take frames from it
+        last_seq = None  # start at the newest frame, not the buffered backlog
         while True:
-            frame = stream_manager.get_frame(device_id, channel)
+            frame, last_seq = stream_manager.get_frame_after(device_id, channel, last_seq)
             if frame:
                 try:
                     self.wfile.write(b'--jpgboundary\r\n')
@@ -682,7 +684,8 @@ class StreamingHandler(BaseHTTPRequestHandler):
 def start_web_server():
     """Start web server"""
     try:
-        server = HTTPServer(('0.0.0.0', WEB_PORT), StreamingHandler)
+        # One thread per request: a long-lived stream must not block the API
+        server = ThreadingHTTPServer(('0.0.0.0', WEB_PORT), StreamingHandler)
         print(f"[*] Web server listening on http://0.0.0.0:{WEB_PORT}")
         print(f"[*] Access the dashboard at: http://localhost:{WEB_PORT} or http://82.180.145.220:{WEB_PORT}")
         server.serve_forever()